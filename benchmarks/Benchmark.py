@@ -0,0 +1,255 @@
+import os, sys, gc, json, time, platform, argparse, tracemalloc
+from benchmarks.Corpus import Corpus
+
+# The layers of the library that can be benchmarked, in the order that they are run.
+LAYERS = ['load', 'tokenize', 'parse_tokens', 'nbt', 'nbt_to_python', 'nbt_to_bytes', 'rebuild_command', 'rebuild_command_source']
+
+# Bumped whenever the results change in a way that makes them incomparable with older results.
+RESULTS_VERSION = 2
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pygradier', 'minecraft', 'mcparser.json')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+class Benchmark:
+    """Benchmarks each layer of the library separately on a generated corpus of commands.
+
+    Each layer is set up before every repeat (outside of the timed section), run once to warm up, and then timed `repeat` times, keeping the best time.
+    It is then run once more while tracing memory allocations to measure its peak memory and the memory still held by its results. Layers that can't
+    be imported (e.g. because the nbt package isn't installed) are skipped."""
+
+    def __init__(self, lines: list, repeat=5, loads=10):
+        self.__lines = lines
+        self.__repeat = repeat
+        self.__loads = loads
+
+    @property
+    def lines(self) -> list:
+        return self.__lines
+
+    @property
+    def repeat(self) -> int:
+        return self.__repeat
+
+    @property
+    def loads(self) -> int:
+        """The number of times that the model is loaded by the `load` layer."""
+        return self.__loads
+
+    def run(self, layers=None) -> dict:
+        """Runs the benchmark of each layer (or the given layers), returning a dictionary of their results."""
+        results = {}
+        for layer in layers or LAYERS:
+            setup = getattr(self, f'_Benchmark__setup_{layer}')
+            try:
+                results[layer] = self.__measure(setup)
+            except ImportError as e:
+                results[layer] = {'skipped': str(e)}
+        return results
+
+    def __measure(self, setup):
+        # Warm up (which also finds any layers whose dependencies can't be imported).
+        run, units, unit = setup()
+        run()
+
+        best = None
+        for _ in range(self.repeat):
+            run, units, unit = setup()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+
+        run, units, unit = setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            result = run()
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+
+        return {
+            'seconds': best,
+            'units': units,
+            'unit': unit,
+            'units_per_second': units / best if best > 0 else None,
+            'peak_bytes': peak - before,
+            'retained_bytes': after - before,
+        }
+
+    def __setup_load(self):
+        from pygradier.model.Model import Model
+        with open(MODEL_PATH, 'r') as file:
+            raw = file.read()
+        data = json.loads(raw)
+        return (lambda: [Model.from_dict(data) for _ in range(self.loads)]), self.loads, 'models'
+
+    def __setup_tokenize(self):
+        parser = self.__get_parser()
+        lines = self.lines
+        tokens = sum(self.__count_tokens(parser.tokenize(line)) for line in lines)
+        return (lambda: [parser.tokenize(line) for line in lines]), tokens, 'tokens'
+
+    def __setup_parse_tokens(self):
+        from pygradier.minecraft.MCParser import MCParser
+        tokenized = [self.__get_parser().tokenize(line) for line in self.lines]
+        tokens = sum(self.__count_tokens(x) for x in tokenized)
+        return (lambda: [MCParser.parse_tokens(x) for x in tokenized]), tokens, 'tokens'
+
+    def __setup_nbt(self):
+        from pygradier.minecraft.MCParser import NBTToken
+        parser = self.__get_parser()
+        literals = [token for line in self.lines for token in self.__find_nbt(parser.tokenize(line))]
+        tokens = self.__count_tokens(literals)
+        return (lambda: [NBTToken(x).nbt for x in literals]), tokens, 'tokens'
+
+    def __setup_nbt_to_python(self):
+        from pygradier.minecraft.MCParser import NBTToken
+        parser = self.__get_parser()
+        literals = [token for line in self.lines for token in self.__find_nbt(parser.tokenize(line))]
+        tokens = self.__count_tokens(literals)
+        return (lambda: [NBTToken(x).to_python() for x in literals]), tokens, 'tokens'
+
+    def __setup_nbt_to_bytes(self):
+        from pygradier.minecraft.MCParser import NBTToken
+        parser = self.__get_parser()
+        literals = [token for line in self.lines for token in self.__find_nbt(parser.tokenize(line))]
+        # Lists with entries of different types can't be written as binary NBT.
+        literals = [x for x in literals if self.__can_write(NBTToken(x))]
+        tokens = self.__count_tokens(literals)
+        return (lambda: [NBTToken(x).to_bytes() for x in literals]), tokens, 'tokens'
+
+    def __setup_rebuild_command(self):
+        from pygradier.minecraft.MCParser import MCParser
+        tokenized = [self.__get_parser().tokenize(line) for line in self.lines]
+        tokens = sum(self.__count_tokens(x) for x in tokenized)
+        parsed = [MCParser.parse_tokens(x) for x in tokenized]
+        return (lambda: [MCParser.rebuild_command(x) for x in parsed]), tokens, 'tokens'
+
+    def __setup_rebuild_command_source(self):
+        # Rebuilds the unmodified commands given their source lines, which copies them from the lines instead of rebuilding them.
+        from pygradier.minecraft.MCParser import MCParser
+        lines = self.lines
+        tokenized = [self.__get_parser().tokenize(line) for line in lines]
+        tokens = sum(self.__count_tokens(x) for x in tokenized)
+        parsed = [MCParser.parse_tokens(x) for x in tokenized]
+        return (lambda: [MCParser.rebuild_command(x, line) for x, line in zip(parsed, lines)]), tokens, 'tokens'
+
+    @classmethod
+    def __get_parser(cls):
+        from pygradier.minecraft.MCParser import MCParser
+        return MCParser.get_parser()
+
+    @classmethod
+    def __can_write(cls, token):
+        try:
+            token.to_bytes()
+            return True
+        except ValueError:
+            return False
+
+    @classmethod
+    def __count_tokens(cls, tokens):
+        count = 0
+        pending = list(tokens)
+        while len(pending) > 0:
+            token = pending.pop()
+            count += 1
+            pending += token.tokens
+        return count
+
+    @classmethod
+    def __find_nbt(cls, tokens):
+        # Finds the outermost NBT literals (compounds and lists) within a line's tokens.
+        pending = list(tokens)
+        while len(pending) > 0:
+            token = pending.pop()
+            if token.group.name in ('CompoundOpen', 'ListOpen'):
+                yield token
+            else:
+                pending += token.tokens
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, threshold=0.2) -> list:
+        """Compares the results of a benchmark against a baseline, returning a list of messages describing each layer whose time or peak memory has
+        increased by more than the given fraction."""
+        regressions = []
+        for layer, result in results['layers'].items():
+            old = baseline['layers'].get(layer)
+            if old is None or 'skipped' in result or 'skipped' in old:
+                continue
+            for key in ('seconds', 'peak_bytes'):
+                if old[key] > 0 and result[key] > old[key] * (1 + threshold):
+                    regressions.append(f"{layer}: {key} increased by {result[key] / old[key] - 1:.1%} ({old[key]:.6g} -> {result[key]:.6g})")
+        return regressions
+
+    @staticmethod
+    def format(results: dict, baseline: dict = None) -> str:
+        """Formats the results of a benchmark as a table (with the change since a baseline, if one is given)."""
+        rows = [f"{'layer':<16} {'seconds':>10} {'units/s':>20} {'peak KiB':>10} {'retain KiB':>10} {'vs baseline':>12}"]
+        for layer, result in results['layers'].items():
+            if 'skipped' in result:
+                rows.append(f"{layer:<16} skipped ({result['skipped']})")
+                continue
+            change = ''
+            old = baseline['layers'].get(layer) if baseline is not None else None
+            if old is not None and 'skipped' not in old and old['seconds'] > 0:
+                change = f"{result['seconds'] / old['seconds'] - 1:+.1%}"
+            rate = f"{result['units_per_second']:,.0f} {result['unit']}" if result['units_per_second'] else ''
+            rows.append(f"{layer:<16} {result['seconds']:>10.4f} {rate:>20} {result['peak_bytes'] / 1024:>10.1f} {result['retained_bytes'] / 1024:>10.1f} {change:>12}")
+        return '\n'.join(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.Benchmark', description="Benchmarks each layer of pygradier on a generated corpus of commands.")
+    parser.add_argument('--lines', type=int, default=2000, help="the number of commands in the corpus")
+    parser.add_argument('--seed', type=int, default=0, help="the seed used to generate the corpus")
+    parser.add_argument('--depth', type=int, default=4, help="the maximum nesting depth of NBT and selector arguments")
+    parser.add_argument('--repeat', type=int, default=5, help="the number of timed runs of each layer (the best is kept)")
+    parser.add_argument('--layers', default=','.join(LAYERS), help="a comma separated list of the layers to run")
+    parser.add_argument('--output', help="the path to save the results to (as JSON)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="the path of the baseline to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the new baseline instead of comparing against it")
+    parser.add_argument('--threshold', type=float, default=0.2, help="the fractional slowdown (or increase in peak memory) counted as a regression")
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.seed, args.depth)
+    benchmark = Benchmark(corpus.generate(args.lines), args.repeat)
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'corpus': {'lines': args.lines, 'seed': args.seed, 'depth': args.depth},
+        'layers': benchmark.run(args.layers.split(',')),
+    }
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        if baseline.get('version') != RESULTS_VERSION or baseline.get('corpus') != results['corpus']:
+            print(f"Ignoring the baseline at {args.baseline} since it was run on a different corpus (or by a different version of the benchmarks).")
+            baseline = None
+
+    print(Benchmark.format(results, baseline))
+    for path in (args.output, args.baseline if args.save_baseline else None):
+        if path is not None:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = Benchmark.compare(results, baseline, args.threshold)
+        for message in regressions:
+            print("REGRESSION " + message)
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
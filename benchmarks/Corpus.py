@@ -0,0 +1,138 @@
+import random
+
+# The kinds of commands that a corpus is made of, along with their relative weights.
+KINDS = {
+    'nbt': 3,
+    'selector': 3,
+    'execute': 3,
+    'comment': 1,
+    'simple': 2,
+}
+
+ENTITIES = ['zombie', 'minecraft:skeleton', 'armor_stand', 'minecraft:villager', 'item']
+BLOCKS = ['stone', 'minecraft:chest', 'oak_stairs', 'minecraft:redstone_wire']
+WORDS = ['foo', 'bar', 'baz', 'alpha', 'beta', 'gamma', 'delta', 'omega']
+NUMBER_SUFFIXES = ['', 'b', 's', 'l', 'f', 'd']
+
+class Corpus:
+    """Generates a reproducible corpus of synthetic (but realistic) Minecraft commands for benchmarking.
+
+    Lines are drawn from a seeded random number generator, so the same seed and size always give the same corpus. The corpus
+    mixes long NBT literals, selectors with many (nested) arguments, long `execute` chains, comments and short commands."""
+
+    def __init__(self, seed=0, depth=4):
+        self.__seed = seed
+        self.__depth = depth
+
+    @property
+    def seed(self) -> int:
+        return self.__seed
+
+    @property
+    def depth(self) -> int:
+        """The maximum depth of nested NBT and selector arguments."""
+        return self.__depth
+
+    def generate(self, size: int) -> list:
+        """Generates a list of commands."""
+        rng = random.Random(self.seed)
+        kinds = list(KINDS)
+        weights = [KINDS[x] for x in kinds]
+        generators = {
+            'nbt': self.__nbt_command,
+            'selector': self.__selector_command,
+            'execute': self.__execute_command,
+            'comment': self.__comment,
+            'simple': self.__simple_command,
+        }
+        return [generators[kind](rng) for kind in rng.choices(kinds, weights, k=size)]
+
+    def write(self, path: str, size: int):
+        """Generates a function file of commands."""
+        with open(path, 'w', encoding='utf-8') as file:
+            for line in self.generate(size):
+                file.write(line + '\n')
+
+    def __nbt_command(self, rng):
+        compound = self.__compound(rng, self.depth, rng.randint(8, 24))
+        choice = rng.randrange(3)
+        if choice == 0:
+            return f"summon {rng.choice(ENTITIES)} ~ ~1 ~ {compound}"
+        elif choice == 1:
+            return f"give @p {rng.choice(BLOCKS)}{compound} {rng.randint(1, 64)}"
+        return f"data merge entity {self.__selector(rng, 1)} {compound}"
+
+    def __selector_command(self, rng):
+        choice = rng.randrange(3)
+        if choice == 0:
+            return f"tp {self.__selector(rng, self.depth)} ~ ~{rng.randint(1, 9)} ~"
+        elif choice == 1:
+            return f"kill {self.__selector(rng, self.depth)}"
+        return f"effect give {self.__selector(rng, self.depth)} speed {rng.randint(1, 60)} {rng.randint(0, 3)}"
+
+    def __execute_command(self, rng):
+        parts = ['execute']
+        for _ in range(rng.randint(3, 8)):
+            choice = rng.randrange(5)
+            if choice == 0:
+                parts.append(f"as {self.__selector(rng, 2)}")
+            elif choice == 1:
+                parts.append("at @s")
+            elif choice == 2:
+                parts.append(f"if score @s {rng.choice(WORDS)} >= @p {rng.choice(WORDS)}")
+            elif choice == 3:
+                parts.append(f"positioned ~ ~{rng.randint(1, 5)} ~")
+            else:
+                parts.append(f"store result score @s {rng.choice(WORDS)}")
+        parts.append("run " + self.__simple_command(rng))
+        return ' '.join(parts)
+
+    def __comment(self, rng):
+        return '# ' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 12)))
+
+    def __simple_command(self, rng):
+        choice = rng.randrange(4)
+        if choice == 0:
+            return "say " + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        elif choice == 1:
+            return f"setblock ~ ~ ~ {rng.choice(BLOCKS)}[facing=north,half=top]"
+        elif choice == 2:
+            return f"scoreboard players operation @s {rng.choice(WORDS)} += @s {rng.choice(WORDS)}"
+        return f"function ns:{rng.choice(WORDS)}/{rng.choice(WORDS)}"
+
+    def __selector(self, rng, depth):
+        args = []
+        for _ in range(rng.randint(1, 2 + depth)):
+            choice = rng.randrange(5)
+            negation = '!' if rng.random() < 0.2 else ''
+            if choice == 0:
+                args.append(f"tag={negation}{rng.choice(WORDS)}")
+            elif choice == 1:
+                args.append(f"distance=..{rng.randint(1, 50)}")
+            elif choice == 2:
+                args.append("scores={" + ','.join(f"{rng.choice(WORDS)}={rng.randint(0, 5)}..{rng.randint(6, 9)}" for _ in range(rng.randint(1, 3))) + "}")
+            elif choice == 3 and depth > 0:
+                args.append(f"nbt={negation}{self.__compound(rng, depth, rng.randint(1, 4))}")
+            else:
+                args.append("advancements={" + f"ns:{rng.choice(WORDS)}=true, ns:{rng.choice(WORDS)}={{{rng.choice(WORDS)}=false}}" + "}")
+        return f"@{rng.choice('aeprs')}[" + ','.join(args) + "]"
+
+    def __compound(self, rng, depth, size):
+        return '{' + ','.join(f"{rng.choice(WORDS)}{i}:{self.__value(rng, depth - 1)}" for i in range(size)) + '}'
+
+    def __value(self, rng, depth):
+        choice = rng.randrange(8 if depth > 0 else 5)
+        if choice == 0:
+            return f"{rng.randint(-100, 100)}{rng.choice(NUMBER_SUFFIXES)}"
+        elif choice == 1:
+            return f"{rng.uniform(-10, 10):.3f}{rng.choice(['d', 'f'])}"
+        elif choice == 2:
+            return '"' + ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + ('\\"' if rng.random() < 0.2 else '') + '"'
+        elif choice == 3:
+            return rng.choice(['true', 'false'])
+        elif choice == 4:
+            kind = rng.choice('BIL')
+            return f"[{kind};" + ','.join(str(rng.randint(0, 9)) for _ in range(rng.randint(1, 8))) + ']'
+        elif choice == 5:
+            return '[' + ','.join(self.__value(rng, depth - 1) for _ in range(rng.randint(1, 4))) + ']'
+        return self.__compound(rng, depth, rng.randint(1, 4))
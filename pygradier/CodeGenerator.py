@@ -0,0 +1,203 @@
+import os, sys, json, hashlib, tempfile, importlib.util
+import pygradier.model.groups as predefined
+from pygradier.model.Model import Model
+from pygradier.model.Group import Group, KeywordGroup
+from pygradier.model.CompiledModel import GOTO, PUSH, POP, END
+
+# Bumped whenever the generated code changes so that previously generated modules are regenerated.
+GENERATOR_VERSION = 4
+
+class CodeGenerator:
+    """Generates a standalone Python module that tokenizes lines the same way as `Parser.tokenize` does for a model.
+
+    The generated module defines one function per state with the transitions inlined on the matched group, and only
+    depends on pygradier for the token, group and error classes (the model itself is never loaded)."""
+
+    def __init__(self, model: Model):
+        self.__model = model
+
+    @property
+    def model(self):
+        return self.__model
+
+    def generate(self, source_hash: str = None) -> str:
+        """Generates the source code of the tokenizer module."""
+        tables = self.model.compiled
+        predefined_names = {id(v): k for k, v in vars(predefined).items() if not k.startswith('_')}
+
+        lines = [
+            "# Generated by pygradier.CodeGenerator. Do not edit.",
+            f"SOURCE_HASH = {source_hash!r}",
+            "",
+            "import re",
+            "from pygradier.Token import Token",
+            "from pygradier.Parser import InvalidTokenError, NonExistentTransitionError, IncompleteParsingError, EndOfLineError",
+            "from pygradier.model.Group import GenericGroup, KeywordGroup",
+            "import pygradier.model.groups as predefined",
+            "",
+        ]
+
+        # Declare the groups, reusing the predefined groups so that tokens can be compared against them.
+        for i, group in enumerate(tables.groups):
+            if id(group) in predefined_names:
+                lines.append(f"G{i} = predefined.{predefined_names[id(group)]}")
+            elif isinstance(group, KeywordGroup):
+                lines.append(f"G{i} = KeywordGroup({', '.join(repr(x) for x in (group.name,) + tuple(group.keywords))})")
+            else:
+                lines.append(f"G{i} = GenericGroup({group.name!r}, {group.regex!r})")
+        lines.append("")
+        for i, pattern in enumerate(tables.patterns):
+            lines.append(f"P{i} = re.compile({pattern.pattern!r}).match")
+
+        for i, state in enumerate(tables.states):
+            lines += self.__generate_state(tables, i)
+
+        lines += [
+            "",
+            "def tokenize(line):",
+            "    \"\"\"Tokenizes a line into a list of tokens.\"\"\"",
+            f"    state = S{tables.start}",
+            "    stack = []",
+            "    tokens = []",
+            "    pos = 0",
+            "    while state is not None:",
+            "        state, pos, tokens = state(line, pos, stack, tokens)",
+            "    if len(stack) > 0:",
+            "        raise EndOfLineError(line, pos)",
+            "    if pos < len(line):",
+            "        raise IncompleteParsingError(line, pos)",
+            "    return tokens",
+            "",
+        ]
+        return '\n'.join(lines)
+
+    def write(self, path: str, source_hash: str = None):
+        """Generates the tokenizer module and writes it to a file. The module is written to a temporary file first and then moved into place,
+        so that processes importing it at the same time never see a partially written module."""
+        source = self.generate(source_hash)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(source)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def get_cache_dir() -> str:
+        """Gets the directory that generated modules are kept in, which is named by the `PYGRADIER_CACHE_DIR` environment variable (or is
+        `$XDG_CACHE_HOME/pygradier` or `~/.cache/pygradier`)."""
+        if 'PYGRADIER_CACHE_DIR' in os.environ:
+            return os.environ['PYGRADIER_CACHE_DIR']
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'pygradier')
+
+    @classmethod
+    def load(cls, json_path: str, module_path: str = None, groups=None):
+        """Imports the tokenizer module generated from a JSON model (and the given groups), (re)generating it first if it doesn't exist or the JSON,
+        the given groups or the predefined groups have changed since. The module is kept in the cache directory (see `get_cache_dir`) unless `module_path` is given."""
+        with open(json_path, 'rb') as file:
+            raw = file.read()
+        digest = hashlib.sha256(raw + f'{GENERATOR_VERSION}'.encode())
+        # The regular expressions of the predefined groups are compiled into the module's patterns, so editing them regenerates the module too.
+        digest.update(cls.__describe_groups({k: v for k, v in vars(predefined).items() if isinstance(v, Group)}).encode())
+        if groups is not None:
+            digest.update(cls.__describe_groups(groups).encode())
+        source_hash = digest.hexdigest()
+        if module_path is None:
+            name = os.path.splitext(os.path.basename(json_path))[0]
+            module_path = os.path.join(cls.get_cache_dir(), f'{name}_tokenizer_{source_hash[:16]}.py')
+
+        if cls.__read_source_hash(module_path) != source_hash:
+            data = json.loads(raw)
+            model = Model.from_dict(data) if groups is None else Model.from_dict(data, groups)
+            cls(model).write(module_path, source_hash)
+
+        name = os.path.splitext(os.path.basename(module_path))[0]
+        spec = importlib.util.spec_from_file_location(name, module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    @classmethod
+    def __describe_groups(cls, groups):
+        # Describes groups (by their name, type and regular expression) so that different groups give a different hash.
+        return repr(sorted((name, type(g).__name__, g.name, g.regex) for name, g in groups.items()))
+
+    @classmethod
+    def __read_source_hash(cls, module_path):
+        try:
+            with open(module_path, 'r') as file:
+                for line in file:
+                    if line.startswith('SOURCE_HASH = '):
+                        return line[len('SOURCE_HASH = '):].strip().strip("'")
+        except OSError:
+            pass
+        return None
+
+    @classmethod
+    def __generate_state(cls, tables, state_id):
+        tokenize = tables.tokenize[state_id]
+        pattern = tables.patterns[state_id]
+        names = {index: name for name, index in pattern.groupindex.items()}
+        lines = [
+            "",
+            f"def S{state_id}(line, pos, stack, tokens):",
+            f"    match = P{state_id}(line, pos)",
+            "    if match is None:",
+            "        raise InvalidTokenError(line, pos)",
+            "    end = match.end()",
+            "    name = match.lastgroup",
+        ]
+
+        keyword = 'if'
+        for index, action in enumerate(tables.actions[state_id]):
+            if action is None:
+                continue
+            group, operation, target, value, peeks = action
+            lines.append(f"    {keyword} name == {names[index]!r}:")
+            keyword = 'elif'
+            body = []
+            if peeks is not None:
+                body.append("top = stack[-1][0] if len(stack) > 0 else None")
+                peek_keyword = 'if'
+                for peek_state, peek_action in peeks.items():
+                    body.append(f"{peek_keyword} top is S{peek_state}:")
+                    body += ['    ' + x for x in cls.__generate_transition(group, tokenize, *peek_action)]
+                    peek_keyword = 'elif'
+            body += cls.__generate_transition(group, tokenize, operation, target, value)
+            lines += ['        ' + x for x in body]
+        lines.append("    raise AssertionError(name)")
+        return lines
+
+    @classmethod
+    def __generate_transition(cls, group, tokenize, operation, target, value):
+        # Tokens that open a region are only created once the region is closed (as in `Parser.tokenize`).
+        if operation == PUSH:
+            return [f"stack.append((S{value}, match.group(), G{group}, pos, end, tokens, {tokenize}))", f"return S{target}, end, []"]
+        lines = []
+        if tokenize:
+            lines.append(f"tokens.append(Token(match.group(), G{group}, (), pos, end))")
+        if operation == GOTO:
+            lines.append(f"return S{target}, end, tokens")
+        elif operation == POP:
+            lines += [
+                "state, text, group, start, stop, parent, keep = stack.pop()",
+                "if keep:",
+                f"    parent.append(Token(text, group, tokens, start, stop, {'tokens[-1]' if tokenize else 'None'}))",
+                "return state, end, parent",
+            ]
+        elif operation == END:
+            lines.append("return None, end, tokens")
+        else:
+            lines.append("raise NonExistentTransitionError(line, pos)")
+        return lines
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python -m pygradier.CodeGenerator <model.json> <output.py>")
+        sys.exit(1)
+    CodeGenerator.load(sys.argv[1], sys.argv[2])
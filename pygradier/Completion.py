@@ -0,0 +1,43 @@
+from pygradier.model.State import State
+
+class Completion:
+    """The result of completing a partially typed line (see `Parser.complete`)."""
+
+    def __init__(self, state: State, stack: list, start: int, text: str):
+        self.__state = state
+        self.__stack = stack
+        self.__start = start
+        self.__text = text
+    
+    def __str__(self):
+        return f"Completion({self.text!r} at {self.start}: {', '.join(self.keywords) or ', '.join(g.name for g in self.groups)})"
+
+    @property
+    def state(self) -> State:
+        """The state reached at the start of the token being completed."""
+        return self.__state
+
+    @property
+    def stack(self) -> list:
+        """The states on the stack at the start of the token being completed (from the bottom of the stack)."""
+        return self.__stack
+
+    @property
+    def start(self) -> int:
+        """The offset in the line of the start of the token being completed."""
+        return self.__start
+
+    @property
+    def text(self) -> str:
+        """The partially typed text of the token being completed."""
+        return self.__text
+
+    @property
+    def keywords(self) -> list:
+        """The keywords that can complete the token (in sorted order)."""
+        return self.state.get_keywords(self.text)
+
+    @property
+    def groups(self) -> list:
+        """The groups that can be matched at the state (in order)."""
+        return self.state.groups
@@ -0,0 +1,32 @@
+class Diagnostic:
+    """An error found while tokenizing a line in recovery mode (see `Parser.tokenize_recover`)."""
+
+    def __init__(self, error, expected: list, lineno: int = None, column: int = None):
+        self.__error = error
+        self.__expected = expected
+        self.__lineno = lineno
+        self.__column = error.pos if column is None else column
+
+    def __str__(self):
+        location = f"{self.lineno}:{self.column}" if self.lineno is not None else f"{self.column}"
+        return f"{location}: {self.error} (expected {', '.join(g.name for g in self.expected)})"
+
+    @property
+    def error(self):
+        """The error that was raised."""
+        return self.__error
+
+    @property
+    def expected(self) -> list:
+        """The groups that were expected where the error occurred."""
+        return self.__expected
+
+    @property
+    def lineno(self) -> int:
+        """The line number of the line that the error occurred on (or None if it isn't known)."""
+        return self.__lineno
+
+    @property
+    def column(self) -> int:
+        """The offset in the line at which the error occurred."""
+        return self.__column
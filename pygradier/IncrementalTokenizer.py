@@ -0,0 +1,113 @@
+from pygradier.Parser import Parser
+from pygradier.Parser import ParserError
+
+class TokenizedLine:
+    """The result of tokenizing a single line of a document."""
+
+    def __init__(self, text: str, tokens: list, error: ParserError, checkpoints: list):
+        self.__text = text
+        self.__tokens = tokens
+        self.__error = error
+        self.__checkpoints = checkpoints
+
+    @property
+    def text(self) -> str:
+        """The text of the line (without its line break)."""
+        return self.__text
+
+    @property
+    def tokens(self) -> list:
+        """The tokens of the line (or None if the line couldn't be tokenized)."""
+        return self.__tokens
+
+    @property
+    def error(self) -> ParserError:
+        """The error raised while tokenizing the line (or None if it was tokenized successfully)."""
+        return self.__error
+
+    @property
+    def checkpoints(self) -> list:
+        """The checkpoints recorded while tokenizing the line (see `Parser.tokenize`)."""
+        return self.__checkpoints
+
+class TokenizedDocument:
+    """The result of tokenizing a document line by line."""
+
+    def __init__(self, lines: list):
+        self.__lines = lines
+
+    @property
+    def lines(self) -> list:
+        """The tokenized lines of the document."""
+        return self.__lines
+
+    @property
+    def text(self) -> str:
+        """The text of the document."""
+        return '\n'.join(line.text for line in self.lines)
+
+class IncrementalTokenizer:
+    """Tokenizes documents (such as function files open in an editor) line by line and re-tokenizes them incrementally after an edit.
+
+    Lines that an edit doesn't touch are reused as they are. If an edit is contained within a single line, the line is resumed from the last
+    checkpoint (a point at which the parser's stack was empty) that lies at least `lookahead` characters before the edit, where `lookahead` is
+    how far past their end the patterns of the model's outermost tokens can look. Tokens before that checkpoint are shared with the previous result."""
+
+    def __init__(self, parser: Parser, lookahead=1):
+        self.__parser = parser
+        self.__lookahead = lookahead
+
+    @property
+    def parser(self) -> Parser:
+        return self.__parser
+
+    @property
+    def lookahead(self) -> int:
+        return self.__lookahead
+
+    def tokenize(self, text: str) -> TokenizedDocument:
+        """Tokenizes each line of a document."""
+        return TokenizedDocument([self.tokenize_line(line) for line in text.split('\n')])
+
+    def tokenize_line(self, text: str, resume_from: TokenizedLine = None, column: int = None) -> TokenizedLine:
+        """Tokenizes a line, resuming from the last usable checkpoint of a previous version of the line if that line's text was edited at the given column."""
+        checkpoints = []
+        line = text.rstrip('\r')
+        try:
+            index = self.__find_checkpoint(resume_from, column)
+            if index is not None:
+                checkpoints += resume_from.checkpoints[:index]
+                tokens = self.parser.resume(line, resume_from.checkpoints[index], resume_from.tokens or [], checkpoints)
+            else:
+                tokens = self.parser.tokenize(line, checkpoints)
+            return TokenizedLine(text, tokens, None, checkpoints)
+        except ParserError as e:
+            return TokenizedLine(text, None, e, checkpoints)
+
+    def update(self, document: TokenizedDocument, start: tuple, end: tuple, text: str) -> TokenizedDocument:
+        """Re-tokenizes a document after the text between two `(line, column)` positions has been replaced with the given text."""
+        start_line, start_column = start
+        end_line, end_column = end
+        old_lines = document.lines
+        prefix = old_lines[start_line].text[:start_column]
+        suffix = old_lines[end_line].text[end_column:]
+        new_texts = (prefix + text + suffix).split('\n')
+
+        if start_line == end_line and len(new_texts) == 1:
+            edited = [self.tokenize_line(new_texts[0], old_lines[start_line], start_column)]
+        else:
+            edited = [self.tokenize_line(x) for x in new_texts]
+        return TokenizedDocument(old_lines[:start_line] + edited + old_lines[end_line+1:])
+
+    def __find_checkpoint(self, line: TokenizedLine, column: int):
+        # Finds the index of the last checkpoint far enough before the edit (checkpoints are recorded in order). If the line
+        # couldn't be tokenized, its tokens weren't kept, so only checkpoints before the first token can be used.
+        if line is None or column is None:
+            return None
+        index = None
+        for i, (pos, state, count) in enumerate(line.checkpoints):
+            if pos + self.lookahead > column:
+                break
+            if line.tokens is not None or count == 0:
+                index = i
+        return index
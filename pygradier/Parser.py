@@ -1,14 +1,27 @@
+import time
+from enum import Enum
 from pygradier.model.Model import Model
+from pygradier.model.CompiledModel import GOTO, PUSH, POP, END
 from pygradier.model.State import State
 from pygradier.model.Transition import Transition
 from pygradier.model.Transition import Operation
 from pygradier.model.Group import GenericGroup
 from pygradier.Token import Token
+from pygradier.Completion import Completion
+from pygradier.Diagnostic import Diagnostic
+from pygradier.Profile import Profile
+from pygradier.Profile import OPERATIONS
 
 class ParserError(Exception):
 
     def __init__(self, msg, line, pos):
         super().__init__(msg + f" HERE --> {line[pos:pos+10]} ...")
+        self.line = line
+        self.pos = pos
+
+    def __reduce__(self):
+        # Errors are restored from their message and position rather than their constructor's arguments (e.g. when returned from another process).
+        return type(self).__new__, (type(self),) + self.args, self.__dict__
 
 class InvalidTokenError(ParserError):
 
@@ -30,63 +43,397 @@ class EndOfLineError(ParserError):
     def __init__(self, line, pos):
         super().__init__(f"Unexpected end of line while parsing", line, pos)
 
+class Engine(Enum):
+
+    # Interprets the model's flat tables (see `Model.compile`).
+    TABLE = 'table'
+
+    # Walks the model's states and transitions directly (slower, but useful as a reference when debugging a model).
+    GRAPH = 'graph'
+
 class Parser:
 
-    def __init__(self, model: Model):
+    def __init__(self, model: Model, engine=Engine.TABLE):
         self.__model = model
+        self.__engine = engine
+        self.__profile = None
 
     @property
     def model(self):
         return self.__model
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def profile(self) -> Profile:
+        """The profile that is being collected (or None if profiling isn't enabled)."""
+        return self.__profile
+
+    def enable_profiling(self) -> Profile:
+        """Starts counting pattern attempts, matches and the time spent matching at each state, along with how often each transition and operation is used, by
+        every call to `tokenize` and `resume` (which always use the table engine while profiling). Returns the profile, which is kept until `disable_profiling` is called.
+
+        Profiling uses a separate instrumented loop, so it doesn't slow down tokenizing while it's disabled. Since the profile is updated without locks, a parser
+        shouldn't be shared between threads while profiling (use a separate parser for the same frozen model instead)."""
+        if self.__profile is None:
+            self.__profile = Profile(self.model)
+        return self.__profile
+
+    def disable_profiling(self) -> Profile:
+        """Stops profiling, returning the profile that was collected."""
+        profile = self.__profile
+        self.__profile = None
+        return profile
     
-    def tokenize(self, line: str):
+    def tokenize(self, line: str, checkpoints: list = None):
+        """Tokenizes a line into a list of tokens. Patterns are matched in place at the current offset, so `^` only matches at the start of the line.
+
+        If a list of checkpoints is given, a checkpoint is added to it (by the table engine) each time the stack is empty before a match, even if tokenizing fails.
+        Tokenizing can be resumed from a checkpoint using `resume`."""
+        if self.__profile is not None:
+            return self.__tokenize_profiled(line, 0, self.model.compiled.start, [], checkpoints, self.__profile)
+        if self.engine == Engine.GRAPH:
+            return self.__tokenize_graph(line)
+        return self.__tokenize_table(line, 0, self.model.compiled.start, [], checkpoints)
+
+    def resume(self, line: str, checkpoint: tuple, tokens: list, checkpoints: list = None):
+        """Resumes tokenizing a line from a checkpoint recorded while tokenizing the same or a different line (as long as the text before the checkpoint is the same),
+        given the tokens produced for that line. The tokens before the checkpoint are reused as they are."""
+        pos, state, count = checkpoint
+        if self.__profile is not None:
+            return self.__tokenize_profiled(line, pos, state, list(tokens[:count]), checkpoints, self.__profile)
+        return self.__tokenize_table(line, pos, state, list(tokens[:count]), checkpoints)
+
+    def complete(self, prefix: str) -> Completion:
+        """Finds the token being typed at the end of a partially typed line, along with the state at its start (whose groups and keywords can complete it).
+
+        The token being completed is the first token that reaches the end of the line, or the text after the point at which the line can't be tokenized any further."""
+        tables = self.model.compiled
+        matchers = tables.matchers
+        actions = tables.actions
+        tokenize = tables.tokenize
+        states = tables.states
+        state = tables.start
+        stack = []
+        pos = 0
+
+        while True:
+            match = matchers[state](prefix, pos)
+            if match is None:
+                break
+            end = match.end()
+            if end == len(prefix) and tokenize[state]:
+                break
+
+            group, operation, target, value, peeks = actions[state][match.lastindex]
+            if peeks is not None and len(stack) > 0:
+                operation, target, value = peeks.get(stack[-1], (operation, target, value))
+            if operation == GOTO:
+                state = target
+            elif operation == PUSH:
+                stack.append(value)
+                state = target
+            elif operation == POP and len(stack) > 0:
+                state = stack.pop()
+            else:
+                break
+            pos = end
+
+        return Completion(states[state], [states[x] for x in stack], pos, prefix[pos:])
+
+    def tokenize_recover(self, line: str, lineno: int = None):
+        """Tokenizes a line, recovering from errors instead of raising them, and returns a tuple of the (partial) tokens and a list of diagnostics.
+
+        After an error inside a region opened by a bracket, tokenizing resumes after the matching closing bracket. Otherwise every open region is
+        closed and tokenizing resumes at the next whitespace. Errors raised while recovering (before the next match) aren't reported again."""
+        tables = self.model.compiled
+        matchers = tables.matchers
+        actions = tables.actions
+        tokenize = tables.tokenize
+        groups = tables.groups
+        states = tables.states
+        state = tables.start
+        stack = []
+        tokens = []
+        diagnostics = []
+        recovering = False
+        pos = 0
+
+        while True:
+            error = None
+            match = matchers[state](line, pos)
+            if match is None:
+                error = InvalidTokenError(line, pos)
+                resume = pos
+            else:
+                start = pos
+                end = match.end()
+                group, operation, target, value, peeks = actions[state][match.lastindex]
+                if peeks is not None and len(stack) > 0:
+                    operation, target, value = peeks.get(stack[-1][0], (operation, target, value))
+                if operation is None or (operation == POP and len(stack) == 0):
+                    # The error is reported at the start of the token, but recovery starts after it (so the token itself is skipped).
+                    error = NonExistentTransitionError(line, start)
+                    resume = end
+
+            if error is not None:
+                if not recovering:
+                    diagnostics.append(Diagnostic(error, states[state].groups, lineno))
+                recovering = True
+                state, pos, tokens = self.__recover(line, resume, state, stack, tokens)
+                if state is None:
+                    break
+                continue
+
+            recovering = False
+            pos = end
+            if operation == PUSH:
+                stack.append((value, match.group(), groups[group], start, pos, tokens, tokenize[state]))
+                tokens = []
+                state = target
+                continue
+            if tokenize[state]:
+                tokens.append(Token(match.group(), groups[group], (), start, pos))
+            if operation == GOTO:
+                state = target
+            elif operation == POP:
+                state, tokens = self.__close_region(stack, tokens, tokens[-1] if tokenize[state] else None)
+            else:
+                break
+
+        if len(stack) > 0:
+            diagnostics.append(Diagnostic(EndOfLineError(line, pos), states[state].groups if state is not None else [], lineno))
+            while len(stack) > 0:
+                state, tokens = self.__close_region(stack, tokens)
+        elif pos < len(line):
+            diagnostics.append(Diagnostic(IncompleteParsingError(line, pos), [], lineno))
+
+        return tokens, diagnostics
+
+    @classmethod
+    def __close_region(cls, stack, tokens, closer=None):
+        # Pops a region off the stack, adding its opening token (with the given subtokens) to the parent region's tokens.
+        state, text, group, start, end, parent, keep = stack.pop()
+        if keep:
+            parent.append(Token(text, group, tokens, start, end, closer))
+        return state, parent
+
+    @classmethod
+    def __recover(cls, line, pos, state, stack, tokens):
+        # Resumes after the closing bracket of the innermost region that was opened with a bracket, if there is one.
+        for i in range(len(stack) - 1, -1, -1):
+            opening = stack[i][1].rstrip(';')[-1:]
+            if opening in ('{', '['):
+                close = cls.__find_closing_bracket(line, pos, opening)
+                if close is not None:
+                    while len(stack) > i:
+                        state, tokens = cls.__close_region(stack, tokens)
+                    return state, close + 1, tokens
+                break
+
+        # Otherwise, close every region and resume at the next whitespace (or after it if the error is at a whitespace).
+        resume = pos
+        while resume < len(line) and not line[resume].isspace():
+            resume += 1
+        if resume == pos and len(stack) == 0:
+            while resume < len(line) and line[resume].isspace():
+                resume += 1
+            if resume == pos:
+                return None, pos, tokens
+        while len(stack) > 0:
+            state, tokens = cls.__close_region(stack, tokens)
+        return state, resume, tokens
+
+    @classmethod
+    def __find_closing_bracket(cls, line, pos, opening):
+        # Finds the bracket that closes a region at the given depth, skipping over quoted strings.
+        closing = '}' if opening == '{' else ']'
+        depth = 1
+        while pos < len(line):
+            c = line[pos]
+            if c == '"' or c == "'":
+                pos += 1
+                while pos < len(line) and line[pos] != c:
+                    pos += 2 if line[pos] == '\\' else 1
+            elif c == opening:
+                depth += 1
+            elif c == closing:
+                depth -= 1
+                if depth == 0:
+                    return pos
+            pos += 1
+        return None
+
+    def __tokenize_table(self, line: str, pos: int, state: int, tokens: list, checkpoints: list):
+        tables = self.model.compiled
+        matchers = tables.matchers
+        actions = tables.actions
+        tokenize = tables.tokenize
+        groups = tables.groups
+        stack = []
+
+        while True:
+            # A checkpoint is a tuple of the position, the state and the number of tokens so far.
+            if checkpoints is not None and len(stack) == 0:
+                checkpoints.append((pos, state, len(tokens)))
+
+            match = matchers[state](line, pos)
+            if match is None:
+                raise InvalidTokenError(line, pos)
+
+            start = pos
+            pos = match.end()
+            group, operation, target, value, peeks = actions[state][match.lastindex]
+            if peeks is not None and len(stack) > 0:
+                operation, target, value = peeks.get(stack[-1][0], (operation, target, value))
+
+            # Tokens that open a region are only created once the region is closed (so that their subtokens aren't copied).
+            if operation == PUSH:
+                stack.append((value, match.group(), groups[group], start, pos, tokens, tokenize[state]))
+                tokens = []
+                state = target
+                continue
+            if tokenize[state]:
+                tokens.append(Token(match.group(), groups[group], (), start, pos))
+
+            if operation == GOTO:
+                state = target
+            elif operation == POP:
+                closer = tokens[-1] if tokenize[state] else None
+                state, text, group, start, end, parent, keep = stack.pop()
+                if keep:
+                    parent.append(Token(text, group, tokens, start, end, closer))
+                tokens = parent
+            elif operation == END:
+                break
+            else:
+                raise NonExistentTransitionError(line, start)
+
+        if len(stack) > 0:
+            raise EndOfLineError(line, pos)
+
+        if pos < len(line):
+            raise IncompleteParsingError(line, pos)
+
+        return tokens
+
+    def __tokenize_profiled(self, line: str, pos: int, state: int, tokens: list, checkpoints: list, profile: Profile):
+        # The same as `__tokenize_table`, but counting how each state and transition is used.
+        tables = self.model.compiled
+        matchers = tables.matchers
+        actions = tables.actions
+        tokenize = tables.tokenize
+        groups = tables.groups
+        attempts = profile.attempts
+        matches = profile.matches
+        times = profile.time
+        transitions = profile.transitions
+        operations = profile.operations
+        clock = time.perf_counter_ns
+        stack = []
+
+        while True:
+            if checkpoints is not None and len(stack) == 0:
+                checkpoints.append((pos, state, len(tokens)))
+
+            attempts[state] += 1
+            started = clock()
+            match = matchers[state](line, pos)
+            times[state] += clock() - started
+            if match is None:
+                raise InvalidTokenError(line, pos)
+            matches[state] += 1
+
+            start = pos
+            pos = match.end()
+            group, operation, target, value, peeks = actions[state][match.lastindex]
+            if peeks is not None and len(stack) > 0 and stack[-1][0] in peeks:
+                operation, target, value = peeks[stack[-1][0]]
+                operations[Operation.PEEK] += 1
+            if operation is not None:
+                transitions[(state, group, operation, target, value)] += 1
+                operations[OPERATIONS[operation]] += 1
+
+            if operation == PUSH:
+                stack.append((value, match.group(), groups[group], start, pos, tokens, tokenize[state]))
+                tokens = []
+                state = target
+                continue
+            if tokenize[state]:
+                tokens.append(Token(match.group(), groups[group], (), start, pos))
+
+            if operation == GOTO:
+                state = target
+            elif operation == POP:
+                closer = tokens[-1] if tokenize[state] else None
+                state, text, group, start, end, parent, keep = stack.pop()
+                if keep:
+                    parent.append(Token(text, group, tokens, start, end, closer))
+                tokens = parent
+            elif operation == END:
+                break
+            else:
+                raise NonExistentTransitionError(line, start)
+
+        if len(stack) > 0:
+            raise EndOfLineError(line, pos)
+
+        if pos < len(line):
+            raise IncompleteParsingError(line, pos)
+
+        return tokens
+
+    def __tokenize_graph(self, line: str):
         state = self.model.start
         stack = []
         tokens = []
+        pos = 0
         
         finished = False
         while not finished:
             # Match the state's pattern at the current position in the line.
-            pattern = state.build_regex()
-            match = pattern.match(line)
+            match = state.pattern.match(line, pos)
             if not match:
-                raise InvalidTokenError(line, 0)
-            
-            # Advance the search forward based on the length of the match.
-            length = match.end()
-            line = line[length:]
+                raise InvalidTokenError(line, pos)
 
             # Get the group that was matched.
             group = state.get_matched_group(match)
             assert group != None
 
-            # Add the match as a token.
-            text = match.group(group.name)
-            token = Token(text, group, [])
-            if state.tokenize:
-                tokens.append(token)
+            # Advance the position to the end of the match.
+            start, pos = match.span()
 
             # Get the next state that this state transitions to given that the particular group was matched.
             transition = state.get_transition(group, stack)
             if not transition:
-                raise NonExistentTransitionError(line, 0)
-            
+                raise NonExistentTransitionError(line, start)
+
+            # Add the match as a token (tokens that open a region are added once the region is closed).
             if transition.operation == Operation.PUSH:
-                stack.append((transition.value, token, tokens))
+                stack.append((transition.value, match.group(), group, start, pos, tokens, state.tokenize))
                 tokens = []
-            elif transition.operation == Operation.POP:
-                subtokens = tokens
-                state, token, tokens = stack.pop()
-                token.tokens.extend(subtokens)
+                state = transition.target
+                continue
+            if state.tokenize:
+                tokens.append(Token(match.group(), group, (), start, pos))
+            
+            if transition.operation == Operation.POP:
+                closer = tokens[-1] if state.tokenize else None
+                state, text, group, start, end, parent, keep = stack.pop()
+                if keep:
+                    parent.append(Token(text, group, tokens, start, end, closer))
+                tokens = parent
             elif transition.operation == Operation.END:
                 finished = True
-            
-            state = transition.target
+            else:
+                state = transition.target
         
         if len(stack) > 0:
-            raise EndOfLineError(line, 0)
+            raise EndOfLineError(line, pos)
 
-        if len(line) > 0:
-            raise IncompleteParsingError(line, 0)
+        if pos < len(line):
+            raise IncompleteParsingError(line, pos)
 
         return tokens
@@ -0,0 +1,89 @@
+from collections import Counter
+from pygradier.model.Model import Model
+from pygradier.model.Transition import Operation
+from pygradier.model.CompiledModel import GOTO, PUSH, POP, END
+
+# The operation of a model's transitions that each compiled operation comes from.
+OPERATIONS = {GOTO: Operation.NONE, PUSH: Operation.PUSH, POP: Operation.POP, END: Operation.END}
+
+class Profile:
+    """Counts how a parser's states and transitions are used while tokenizing with profiling enabled (see `Parser.enable_profiling`).
+
+    States are identified by their id in the model's compiled tables, and groups by their id, so that counting them is cheap. The `report`
+    maps them back to the names of the regions, states and groups in the model."""
+
+    def __init__(self, model: Model):
+        self.__model = model
+        self.reset()
+
+    @property
+    def model(self) -> Model:
+        return self.__model
+
+    @property
+    def attempts(self) -> list:
+        """The number of times that each state's pattern was matched against a line, indexed by state id."""
+        return self.__attempts
+
+    @property
+    def matches(self) -> list:
+        """The number of times that each state's pattern matched, indexed by state id."""
+        return self.__matches
+
+    @property
+    def time(self) -> list:
+        """The time (in nanoseconds) spent matching each state's pattern, indexed by state id."""
+        return self.__time
+
+    @property
+    def transitions(self) -> Counter:
+        """The number of times that each transition was taken, keyed by a tuple of `(state id, group id, operation, target state id, pushed state id)`."""
+        return self.__transitions
+
+    @property
+    def operations(self) -> Counter:
+        """The number of times that each operation was applied, keyed by `Operation` (PEEK is counted when a PEEK transition overrides another)."""
+        return self.__operations
+
+    def reset(self):
+        """Discards the counts collected so far."""
+        count = len(self.model.compiled.states)
+        self.__attempts = [0] * count
+        self.__matches = [0] * count
+        self.__time = [0] * count
+        self.__transitions = Counter()
+        self.__operations = Counter()
+
+    def get_state_names(self) -> list:
+        """Gets the name of each state as `Region.State`, indexed by state id."""
+        names = self.model.get_state_names()
+        return [names.get(state, f'<state {i}>') for i, state in enumerate(self.model.compiled.states)]
+
+    def report(self, limit: int = None) -> str:
+        """Formats the counts as a table of the states (slowest first) followed by a table of the transitions (most used first) and the count of each operation."""
+        tables = self.model.compiled
+        names = self.get_state_names()
+        width = max(len(x) for x in names)
+
+        lines = [f"{'state':<{width}} {'attempts':>10} {'matches':>10} {'failures':>10} {'ms':>10} {'us/attempt':>10}"]
+        ranked = sorted((i for i in range(len(names)) if self.attempts[i] > 0), key=lambda i: self.time[i], reverse=True)
+        for i in ranked[:limit]:
+            attempts, matches, time = self.attempts[i], self.matches[i], self.time[i]
+            lines.append(f"{names[i]:<{width}} {attempts:>10} {matches:>10} {attempts - matches:>10} {time / 1e6:>10.3f} {time / attempts / 1e3:>10.3f}")
+
+        transitions = []
+        for (state, group, operation, target, value), count in self.transitions.most_common(limit):
+            description = f"{names[state]} --{tables.groups[group].name}--> "
+            if operation == PUSH:
+                description += f"{names[target]} (PUSH {names[value]})"
+            elif operation == GOTO:
+                description += names[target]
+            else:
+                description += OPERATIONS[operation].name
+            transitions.append((description, count))
+        width = max([len('transition')] + [len(x) for x, _ in transitions])
+        lines += ['', f"{'transition':<{width}} {'count':>10}"]
+        lines += [f"{description:<{width}} {count:>10}" for description, count in transitions]
+
+        lines += ['', ', '.join(f"{operation.name}: {self.operations[operation]}" for operation in Operation)]
+        return '\n'.join(lines)
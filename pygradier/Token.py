@@ -1,11 +1,20 @@
 from pygradier.model.Group import Group
 
 class Token:
+    """A matched string along with the group that matched it and its subtokens. Passing an empty tuple as the subtokens makes the token an immutable leaf
+    (which avoids allocating a list for it), while any other sequence of subtokens is copied into a list.
 
-    def __init__(self, match: str, group: Group, tokens: list):
+    The token that opens a region is given the token that closed the region (its last subtoken) as its `closer`, so that consumers don't have to search its subtokens for it."""
+
+    __slots__ = ('__match', '__group', '__tokens', '__start', '__end', '__closer')
+
+    def __init__(self, match: str, group: Group, tokens: list, start: int = None, end: int = None, closer = None):
         self.__match = match
         self.__group = group
-        self.__tokens = tokens.copy()
+        self.__tokens = () if tokens == () else list(tokens)
+        self.__start = start
+        self.__end = end
+        self.__closer = closer
     
     def __str__(self):
         return f"{str(None) if self.group is None else self.group.name}({self.match}" + (f", [{', '.join(str(t) for t in self.tokens)}]" if len(self.tokens) > 0 else "") + ")"
@@ -14,6 +23,25 @@ class Token:
     def tokens(self):
         return self.__tokens
 
+    @property
+    def closer(self):
+        """Gets the token that closed the region opened by this token, which is its last subtoken (or None if the token doesn't open a region, or the region was closed without a token)."""
+        return self.__closer
+
+    @property
+    def contents(self):
+        """Gets the subtokens without the token that closed the region (see `closer`)."""
+        return self.__tokens[:-1] if self.__closer is not None else self.__tokens
+
+    def freeze(self):
+        """Makes the token and its subtokens immutable by converting their lists of subtokens into tuples, returning the token."""
+        pending = [self]
+        while len(pending) > 0:
+            token = pending.pop()
+            token.__tokens = tuple(token.__tokens)
+            pending.extend(token.__tokens)
+        return self
+
     @property
     def match(self) -> str:
         """Gets the matched string."""
@@ -23,3 +51,13 @@ class Token:
     def group(self) -> Group:
         """Gets the group that matched this token."""
         return self.__group
+
+    @property
+    def start(self) -> int:
+        """Gets the offset of the start of the match in the source line (or None if the token wasn't tokenized from a line)."""
+        return self.__start
+
+    @property
+    def end(self) -> int:
+        """Gets the offset of the end of the match in the source line (or None if the token wasn't tokenized from a line)."""
+        return self.__end
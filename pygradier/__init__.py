@@ -1,2 +1,4 @@
 from pygradier.Parser import Parser
 from pygradier.Token import Token
+from pygradier.Completion import Completion
+from pygradier.Profile import Profile
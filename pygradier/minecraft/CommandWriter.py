@@ -0,0 +1,95 @@
+class CommandWriter:
+    """Writes commands rebuilt from their parameters into a text stream (such as an open file or an `io.StringIO`).
+
+    The parts of a command are collected as it's written and then written to the stream at once, so that nested parameters don't build their own strings.
+    If the source line that the parameters were parsed from is given, every parameter or token that hasn't been modified since it was parsed (see
+    `write_token`) is copied from the source line as it is instead of being rebuilt, so only the modified parts of a command are rebuilt."""
+
+    def __init__(self, stream=None):
+        self.__stream = stream
+        self.__parts = []
+        self.__source = None
+
+    @property
+    def stream(self):
+        """The stream that commands are written to (or None if the written text is only returned by `flush`)."""
+        return self.__stream
+
+    @property
+    def source(self) -> str:
+        """The source line of the command being written (or None if every part of the command is rebuilt)."""
+        return self.__source
+
+    @staticmethod
+    def render(token) -> str:
+        """Rebuilds the string of a single parameter or token."""
+        writer = CommandWriter()
+        writer.write_token(token)
+        return writer.flush()
+
+    def write(self, text: str):
+        """Writes a string."""
+        self.__parts.append(text)
+
+    def write_token(self, token):
+        """Writes a parameter or token, copying it from the source line if it has a position in the source line and hasn't been modified (see `is_unmodified`).
+        Tokens without a `write` method are written as their string."""
+        if self.__source is not None and self.is_unmodified(token):
+            self.__parts.append(self.__source[token.start:token.end])
+        elif hasattr(token, 'write'):
+            token.write(self)
+        else:
+            self.__parts.append(str(token))
+
+    def is_unmodified(self, token) -> bool:
+        """Determines whether a token can be copied from the source line, which requires a source line and the token's position in it, and the token (including
+        its parts) to not have been modified since it was parsed (tokens without a `modified` property can't be modified)."""
+        return self.__source is not None and token.start is not None and token.end is not None and not getattr(token, 'modified', False)
+
+    def write_command(self, parameters, source: str = None, end: str = ''):
+        """Writes a command rebuilt from its parameters (separated by spaces), followed by `end`, and then flushes it to the stream. If the source line
+        is given, the text before the first parameter (such as a leading '/') and between consecutive unmodified parameters is also copied from it, so an
+        unmodified command is written exactly as it was parsed."""
+        self.__source = source
+        parts = self.__parts
+        copied = None
+        try:
+            if source is not None and len(parameters) > 0:
+                parts.append(self.__get_prefix(parameters[0], source))
+            for i, parameter in enumerate(parameters):
+                if self.is_unmodified(parameter):
+                    # Extend the run of unmodified parameters, which is copied as a single slice of the source line.
+                    if copied is None:
+                        if i > 0:
+                            parts.append(' ')
+                        copied = [parameter.start, parameter.end]
+                    else:
+                        copied[1] = parameter.end
+                    continue
+                if copied is not None:
+                    parts.append(source[copied[0]:copied[1]])
+                    copied = None
+                if i > 0:
+                    parts.append(' ')
+                self.write_token(parameter)
+            if copied is not None:
+                parts.append(source[copied[0]:copied[1]])
+        finally:
+            self.__source = None
+        parts.append(end)
+        return self.flush()
+
+    @staticmethod
+    def __get_prefix(parameter, source):
+        # A command can only be preceded by a '/', which is found in the source line if the first parameter was replaced.
+        if parameter.start is not None:
+            return source[:parameter.start]
+        return source[:len(source) - len(source.lstrip('/'))]
+
+    def flush(self) -> str:
+        """Writes everything written since the last flush to the stream, returning it."""
+        text = ''.join(self.__parts)
+        self.__parts.clear()
+        if self.__stream is not None:
+            self.__stream.write(text)
+        return text
@@ -1,18 +1,80 @@
-import nbt, pygradier, os, json, re, codecs
-from abc import ABC, abstractproperty
+import pygradier, os, json, re, struct, threading, functools
+from abc import ABC, abstractmethod
 from enum import Enum
 from pygradier.model.groups import *
 from pygradier.model.Group import Group
 from pygradier.model.Model import Model
 from pygradier.Parser import Parser
+from pygradier.Parser import ParserError
+from pygradier.Diagnostic import Diagnostic
 from pygradier.Token import Token
-from nbt.tags import *
+from pygradier.minecraft.CommandWriter import CommandWriter
 
+# The size of the buffer used when reading function files.
+FILE_BUFFER_SIZE = 1 << 20
+
+# The parser is built on first use (see `MCParser.get_parser`).
 PARSER = None
-with open(os.path.join(os.path.dirname(__file__), 'mcparser.json'), 'r') as file:
-    data = json.load(file)
-    model = Model.from_dict(data)
-    PARSER = Parser(model)
+PARSER_LOCK = threading.Lock()
+
+def __getattr__(name):
+    # The NBT tag classes are only imported (along with the nbt package) once they are first used.
+    if name.startswith('TAG_'):
+        from pygradier.minecraft import NBTTags
+        return getattr(NBTTags, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _get_source_end(token):
+    # Gets the offset of the end of a raw token's text in the source line, including its subtokens (a region ends with the token that closed it).
+    while token.closer is None and len(token.tokens) > 0:
+        token = token.tokens[-1]
+    return token.closer.end if token.closer is not None else token.end
+
+# The kinds of NBT values (see `NBTToken`).
+NBT_NUMBER = 0
+NBT_STRING = 1
+NBT_WORD = 2
+NBT_BOOLEAN = 3
+NBT_BYTE_ARRAY = 4
+NBT_INT_ARRAY = 5
+NBT_LONG_ARRAY = 6
+NBT_LIST = 7
+NBT_COMPOUND = 8
+
+# The ids of the names of the groups that parameters are built from (see `Group.id`).
+EOL_ID = Group.get_name_id('EOL')
+SELECTOR_PARAMETER_ID = Group.get_name_id('SelectorParameter')
+HYBRID_PARAMETER_ID = Group.get_name_id('HybridParameter')
+COMMENT_ID = Group.get_name_id('Comment')
+KEYWORD_ID = Group.get_name_id('Keyword')
+NEGATION_ID = Group.get_name_id('Negation')
+SCORES_ARGUMENT_ID = Group.get_name_id('ScoresArgument')
+NBT_ARGUMENT_ID = Group.get_name_id('NBTArgument')
+ADVANCEMENTS_ARGUMENT_ID = Group.get_name_id('AdvancementsArgument')
+CRITERIA_OPEN_ID = Group.get_name_id('CriteriaOpen')
+BLOCK_STATES_OPEN_ID = Group.get_name_id('BlockStatesOpen')
+COMPOUND_OPEN_ID = Group.get_name_id('CompoundOpen')
+LIST_OPEN_ID = Group.get_name_id('ListOpen')
+LIST_INDEX_OPEN_ID = Group.get_name_id('ListIndexOpen')
+
+# The kind of the value matched by each group, keyed on the id of the group's name.
+NBT_KINDS = {
+    Number.id: NBT_NUMBER,
+    String.id: NBT_STRING,
+    Word.id: NBT_WORD,
+    Group.get_name_id('Boolean'): NBT_BOOLEAN,
+    Group.get_name_id('ByteArrayOpen'): NBT_BYTE_ARRAY,
+    Group.get_name_id('IntArrayOpen'): NBT_INT_ARRAY,
+    Group.get_name_id('LongArrayOpen'): NBT_LONG_ARRAY,
+    LIST_OPEN_ID: NBT_LIST,
+    COMPOUND_OPEN_ID: NBT_COMPOUND,
+}
+
+# The binary tag id and struct format of each type of number (given by its suffix, or 'i' for integers without one).
+NBT_NUMBER_FORMATS = {'b': (1, '>b'), 's': (2, '>h'), 'i': (3, '>i'), 'l': (4, '>q'), 'f': (5, '>f'), 'd': (6, '>d')}
+
+# The binary tag id of each kind of array, along with the struct format of its entries.
+NBT_ARRAY_FORMATS = {NBT_BYTE_ARRAY: (7, 'b'), NBT_INT_ARRAY: (11, 'i'), NBT_LONG_ARRAY: (12, 'q')}
 
 class SelectorType(Enum):
     ALL_PLAYERS = '@a'
@@ -21,53 +83,16 @@ class SelectorType(Enum):
     RANDOM_PLAYER = '@r'
     EXECUTOR = '@s'
 
-class TAG_Boolean(TAG_Byte):
-
-    def __init__(self, name: str, value: bool):
-        super().__init__(name, 1 if value else 0)
-    
-    def __str__(self):
-        return 'false' if self.value == 0 else 'true'
-
-    def set_boolean_value(self, value: bool):
-        self.value = 1 if value else 0
-
-class TAG_GenericList(nbt.NBTTag):
-
-    def __init__(self, name: str):
-        super().__init__(name, None)
-        self.__tags = []
-    
-    def __str__(self):
-        return '[' + ','.join(f'{tag}' for tag in self.tags) + ']'
-
-    @property
-    def tags(self):
-        return self.__tags
-    
-    @property
-    def value(self):
-        return self
-    
-    def validate(self, value):
-        pass
+class Parameter(Token):
+    """A base class for a token that serves as a command parameter that can be reconstructed into a command string.
 
-    @classmethod
-    def get_id(cls):
-        return None
-    
-    def payload(self):
-        raise Exception("Generic list tags cannot be written to an NBT file.")
-    
-    @classmethod
-    def load(cls, name, fp):
-        pass
+    Parameters (and the tokens within them) that are parsed from a line have the offsets of their text in the line as their `start` and `end`,
+    so that they can be copied from the line as they are while they haven't been modified (see `CommandWriter`)."""
 
-class Parameter(Token):
-    """A base class for a token that serves as a command parameter that can be reconstructed into a command string."""
+    __slots__ = ()
     
-    def __init__(self, match: str, group: Group, tokens: list):
-        super().__init__(match, group, tokens)
+    def __init__(self, match: str, group: Group, tokens: list, start: int = None, end: int = None):
+        super().__init__(match, group, tokens, start, end)
     
     def __str__(self):
         return self.get_command_string()
@@ -75,17 +100,25 @@ class Parameter(Token):
     def get_command_string(self):
         return self.match
 
+    def write(self, writer: CommandWriter):
+        """Writes the parameter's command string into a `CommandWriter`."""
+        writer.write(self.get_command_string())
+
 class GenericParameter(Parameter):
     """A generic paramater that contains only a single keyword."""
 
-    def __init__(self, keyword: str):
-        super().__init__(keyword, Generic, [])
+    __slots__ = ()
+
+    def __init__(self, keyword: str, start: int = None, end: int = None):
+        super().__init__(keyword, Generic, [], start, end)
 
 class RawToken(Token):
     """A raw token whose string conversion method produces its match only."""
 
+    __slots__ = ()
+
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, token.tokens)
+        super().__init__(token.match, token.group, token.tokens, token.start, _get_source_end(token))
     
     def __str__(self):
         return self.match
@@ -93,8 +126,10 @@ class RawToken(Token):
 class BooleanToken(Token):
     """A token that contains a boolean value."""
 
+    __slots__ = ('__value',)
+
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, token.tokens)
+        super().__init__(token.match, token.group, token.tokens, token.start, _get_source_end(token))
         self.__value = True if self.match.lower() == 'true' else False
     
     def __str__(self):
@@ -107,8 +142,10 @@ class BooleanToken(Token):
 class RangeToken(Token):
     """A token that contains an integer range."""
 
+    __slots__ = ('__value', '__low', '__high')
+
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, token.tokens)
+        super().__init__(token.match, token.group, token.tokens, token.start, _get_source_end(token))
         match = re.match(r'^(?P<int>-?\d+)$|(?P<low>-?\d+)?\.{0,2}(?P<high>-?\d+)?', self.match)
         self.__value = int(match.group('int')) if match.group('int') else None
         self.__low = int(match.group('low')) if match.group('low') else None
@@ -145,88 +182,304 @@ class RangeToken(Token):
         return self.__high
 
 class NBTToken(Token):
-    """A token that contains NBT data."""
+    """A token that contains NBT data (which is only converted into NBT tags when it's first used).
+
+    The data can also be converted straight into plain Python values (`to_python`) or binary NBT (`to_bytes`) without creating any NBT tags."""
+
+    __slots__ = ('__value', '__root')
+
+    # The converters of each kind of value into NBT tags (see `__get_converters`), built on first use since they import the nbt package.
+    __converters = None
 
     def __init__(self, token: Token):
-        super().__init__("", token.group, [token])
-        self.__root = self.__get_tag(Token("", None, [token]))
+        super().__init__("", token.group, [token], token.start, _get_source_end(token))
+        self.__value = token
+        self.__root = None
     
     def __str__(self):
         return str(self.nbt)
     
     @property
     def nbt(self):
+        if self.__root is None:
+            self.__root = self.__build("", self.__value)
         return self.__root
 
-    @classmethod
-    def __get_tag(cls, token):
-        tag = None
-        name = token.match
-        value = token.tokens[0]
-        if value.group == Number:
-            literal = value.match[-1]
-            if literal.lower() == 'b':
-                tag = TAG_Byte(name, int(value.match[:-1]))
-            elif literal.lower() == 'd':
-                tag = TAG_Double(name, float(value.match[:-1]))
-            elif literal.lower() == 'f':
-                tag = TAG_Float(name, float(value.match[:-1]))
-            elif literal.lower() == 'l':
-                tag = TAG_Long(name, int(value.match[:-1]))
-            elif literal.lower() == 's':
-                tag = TAG_Short(name, int(value.match[:-1]))
-            elif '.' in value.match:
-                tag = TAG_Double(name, float(value.match))
+    @property
+    def modified(self):
+        """Indicates whether the NBT data has been modified, i.e. its NBT tags have been built and no longer produce the same string as tags built from
+        the source (reading the tags doesn't count as modifying them). The tags are only built from the source again here, so reading them costs nothing extra."""
+        return self.__root is not None and str(self.__root) != str(self.__build("", self.__value))
+
+    def write(self, writer: CommandWriter):
+        writer.write(str(self.nbt))
+
+    def to_python(self):
+        """Converts the NBT data into plain Python values, where compounds become dictionaries, lists and arrays become lists, numbers become
+        integers or floats (regardless of their suffix), strings become strings and booleans become booleans."""
+        # Each frame on the stack is a compound (as a dictionary) or list that is being converted, as a tuple of (container, name, remaining entries).
+        kinds = NBT_KINDS
+        stack = []
+        name, value = "", self.__value
+        while True:
+            kind = kinds.get(value.group.id)
+            if kind == NBT_COMPOUND:
+                stack.append(({}, name, iter(value.contents)))
+            elif kind == NBT_LIST:
+                stack.append(([], name, iter(value.contents)))
             else:
-                tag = TAG_Int(name, int(value.match))
-        elif value.group == String:
-            tag = TAG_String(name, codecs.decode(value.match[1:-1], 'unicode_escape').encode('latin1').decode('utf-8'))
-        elif value.group == Word:
-            tag = TAG_String(name, value.match)
-        elif value.group.name == "Boolean":
-            tag = TAG_Boolean(name, True if value.match == 'true' else False)
-        elif value.group.name == "ByteArrayOpen":
-            tag = TAG_Byte_Array(name, [int(entry.match) for entry in value.tokens[:-1]])
-        elif value.group.name == "IntArrayOpen":
-            tag = TAG_Int_Array(name, [int(entry.match) for entry in value.tokens[:-1]])
-        elif value.group.name == "LongArrayOpen":
-            tag = TAG_Long_Array(name, [int(entry.match) for entry in value.tokens[:-1]])
-        elif value.group.name == "ListOpen":
-            generic_list = TAG_GenericList(name)
-            use_generic_list = False
-            list_type = None
-            for entry in value.tokens:
-                if entry.group.name == "ListClose":
+                if kind == NBT_NUMBER:
+                    result = self.__parse_number(value.match)[1]
+                elif kind == NBT_STRING:
+                    result = self.__decode_string(value.match)
+                elif kind == NBT_WORD:
+                    result = value.match
+                elif kind == NBT_BOOLEAN:
+                    result = value.match == 'true'
+                elif kind is not None:
+                    result = [int(entry.match) for entry in value.contents]
+                else:
+                    result = None
+                if len(stack) == 0:
+                    return result
+                container = stack[-1][0]
+                if type(container) is dict:
+                    container[name] = result
+                else:
+                    container.append(result)
+
+            # Move on to the next entry, finishing each compound or list whose entries have all been converted.
+            while True:
+                container, container_name, entries = stack[-1]
+                entry = next(entries, None)
+                if entry is not None:
+                    name, value = self.__decode_name(entry), entry.tokens[0]
                     break
-                entry_tag = cls.__get_tag(entry)
-                generic_list.tags.append(entry_tag)
-                if list_type is None:
-                    list_type = type(entry_tag)
-                elif not isinstance(entry_tag, list_type):
-                    use_generic_list = True
-            if not use_generic_list:
-                tag = TAG_List(name, list_type)
-                tag.extend(generic_list.tags)
+                stack.pop()
+                if len(stack) == 0:
+                    return container
+                parent = stack[-1][0]
+                if type(parent) is dict:
+                    parent[container_name] = container
+                else:
+                    parent.append(container)
+
+    def to_bytes(self) -> bytes:
+        """Converts the NBT data into binary (big-endian, uncompressed) NBT, as a single named tag with an empty name. Booleans are written as bytes.
+        Raises a ValueError if a list contains entries of different types, since binary NBT lists can only contain one type."""
+        buffer = bytearray()
+        pack = struct.pack
+        # Each frame on the stack is a compound or list that is being written, as a list of [kind, remaining entries, offset of the list's header,
+        # tag id of the list's entries, number of entries in the list]. The header of a list is only filled in once its entries have been written.
+        kinds = NBT_KINDS
+        stack = []
+        name, value = "", self.__value
+        while True:
+            kind = kinds.get(value.group.id)
+            payload = None
+            if kind == NBT_NUMBER:
+                suffix, number = self.__parse_number(value.match)
+                tag_id, number_format = NBT_NUMBER_FORMATS[suffix]
+                try:
+                    payload = pack(number_format, number)
+                except (struct.error, OverflowError):
+                    raise ValueError(f"The number {value.match} is out of range for its type")
+            elif kind == NBT_STRING or kind == NBT_WORD:
+                tag_id = 8
+                payload = self.__encode_string(self.__decode_string(value.match) if kind == NBT_STRING else value.match)
+            elif kind == NBT_BOOLEAN:
+                tag_id = 1
+                payload = b'\x01' if value.match == 'true' else b'\x00'
+            elif kind == NBT_LIST:
+                tag_id = 9
+            elif kind == NBT_COMPOUND:
+                tag_id = 10
+            elif kind is not None:
+                tag_id, entry_format = NBT_ARRAY_FORMATS[kind]
+                entries = [int(entry.match) for entry in value.contents]
+                try:
+                    payload = pack(f'>i{len(entries)}{entry_format}', len(entries), *entries)
+                except (struct.error, OverflowError):
+                    raise ValueError(f"An entry of a {value.match}...] array is out of range for its type")
+            else:
+                raise ValueError(f"Can't convert a value of group '{value.group.name}' into binary NBT")
+
+            # Entries of compounds (and the root) are named tags, whereas entries of lists only have a payload.
+            if len(stack) == 0 or stack[-1][0] == NBT_COMPOUND:
+                buffer.append(tag_id)
+                buffer += self.__encode_string(name)
+            else:
+                frame = stack[-1]
+                if frame[3] is None:
+                    frame[3] = tag_id
+                elif frame[3] != tag_id:
+                    raise ValueError("Can't convert a list with entries of different types into binary NBT")
+                frame[4] += 1
+
+            if kind == NBT_COMPOUND:
+                stack.append([kind, iter(value.contents), None, None, 0])
+            elif kind == NBT_LIST:
+                stack.append([kind, iter(value.contents), len(buffer), None, 0])
+                buffer += bytes(5)
+            else:
+                buffer += payload
+                if len(stack) == 0:
+                    return bytes(buffer)
+
+            # Move on to the next entry, finishing each compound or list whose entries have all been written.
+            while True:
+                frame = stack[-1]
+                entry = next(frame[1], None)
+                if entry is not None:
+                    name, value = self.__decode_name(entry), entry.tokens[0]
+                    break
+                stack.pop()
+                if frame[0] == NBT_COMPOUND:
+                    buffer.append(0)
+                else:
+                    struct.pack_into('>bi', buffer, frame[2], frame[3] or 0, frame[4])
+                if len(stack) == 0:
+                    return bytes(buffer)
+
+    @classmethod
+    def __build(cls, name, value):
+        # Converts a value into a tag without recursing. Each frame on the stack is a compound or list that is being converted, as a list of
+        # [compound tag (or None for lists), list of tags (or None for compounds), name, remaining entries].
+        converters, TAG_Compound, list_tag = cls.__get_converters()
+        kinds = NBT_KINDS
+        stack = []
+        while True:
+            kind = kinds.get(value.group.id)
+            if kind == NBT_COMPOUND:
+                stack.append([TAG_Compound(name), None, name, iter(value.contents)])
+            elif kind == NBT_LIST:
+                stack.append([None, [], name, iter(value.contents)])
             else:
-                tag = generic_list
-        elif value.group.name == "CompoundOpen":
-            tag = TAG_Compound(name)
-            for sub_token in value.tokens:
-                if sub_token.group.name == "CompoundClose":
+                tag = converters[kind](name, value) if kind is not None else None
+                if len(stack) == 0:
+                    return tag
+                frame = stack[-1]
+                if frame[0] is not None:
+                    frame[0].add(tag)
+                else:
+                    frame[1].append(tag)
+
+            # Move on to the next entry, finishing each compound or list whose entries have all been converted.
+            while True:
+                frame = stack[-1]
+                entry = next(frame[3], None)
+                if entry is not None:
+                    name, value = cls.__decode_name(entry), entry.tokens[0]
                     break
-                tag.add(cls.__get_tag(sub_token))
-        return tag
+                stack.pop()
+                tag = frame[0] if frame[0] is not None else list_tag(frame[2], frame[1])
+                if len(stack) == 0:
+                    return tag
+                frame = stack[-1]
+                if frame[0] is not None:
+                    frame[0].add(tag)
+                else:
+                    frame[1].append(tag)
+
+    @classmethod
+    def __parse_number(cls, match):
+        # Parses a number into a tuple of its type (as its suffix, or 'i' for integers without one) and its value.
+        suffix = match[-1].lower()
+        if suffix in 'bslfd':
+            return suffix, (float if suffix in 'fd' else int)(match[:-1])
+        elif '.' in match:
+            return 'd', float(match)
+        return 'i', int(match)
+
+    @classmethod
+    def __decode_name(cls, entry):
+        # The names of a compound's entries can be quoted strings, which are decoded like string values.
+        return cls.__decode_string(entry.match) if NBT_KINDS.get(entry.group.id) == NBT_STRING else entry.match
+
+    @classmethod
+    def __decode_string(cls, match):
+        # Strings without escape sequences are the same once decoded.
+        text = match[1:-1]
+        if '\\' in text:
+            # Characters that aren't escaped are kept as they are (the decoder reads its input as Latin-1, so other characters are escaped first).
+            text = text.encode('latin-1', 'backslashreplace').decode('unicode_escape')
+        return text
+
+    @classmethod
+    def __encode_string(cls, text):
+        # Encodes a string as its length followed by Java's modified UTF-8 (where null characters and characters outside of the basic multilingual plane
+        # are encoded differently to UTF-8).
+        if text.isascii() and '\x00' not in text:
+            data = text.encode('ascii')
+        else:
+            data = bytearray()
+            for c in text:
+                code = ord(c)
+                if 0 < code < 0x80:
+                    data.append(code)
+                elif code < 0x800:
+                    data += bytes((0xC0 | code >> 6, 0x80 | code & 0x3F))
+                elif code < 0x10000:
+                    data += bytes((0xE0 | code >> 12, 0x80 | code >> 6 & 0x3F, 0x80 | code & 0x3F))
+                else:
+                    code -= 0x10000
+                    for surrogate in (0xD800 | code >> 10, 0xDC00 | code & 0x3FF):
+                        data += bytes((0xE0 | surrogate >> 12, 0x80 | surrogate >> 6 & 0x3F, 0x80 | surrogate & 0x3F))
+        if len(data) > 0xFFFF:
+            raise ValueError(f"Can't convert a string longer than {0xFFFF} bytes into binary NBT")
+        return struct.pack('>H', len(data)) + data
+
+    @classmethod
+    def __get_converters(cls):
+        # Builds a tuple of (converters of each kind of value into tags, the compound tag class, a function that builds a list tag).
+        if cls.__converters is not None:
+            return cls.__converters
+        from pygradier.minecraft.NBTTags import TAG_Byte, TAG_Short, TAG_Int, TAG_Long, TAG_Float, TAG_Double, TAG_String, \
+            TAG_Byte_Array, TAG_Int_Array, TAG_Long_Array, TAG_List, TAG_Compound, TAG_Boolean, TAG_GenericList
+
+        number_tags = {'b': TAG_Byte, 's': TAG_Short, 'i': TAG_Int, 'l': TAG_Long, 'f': TAG_Float, 'd': TAG_Double}
+
+        def number(name, value):
+            suffix, number = cls.__parse_number(value.match)
+            return number_tags[suffix](name, number)
+
+        def list_tag(name, tags):
+            # A list whose entries aren't all of the first entry's type becomes a generic list.
+            list_type = None
+            for tag in tags:
+                if list_type is None:
+                    list_type = type(tag)
+                elif not isinstance(tag, list_type):
+                    generic_list = TAG_GenericList(name)
+                    generic_list.tags.extend(tags)
+                    return generic_list
+            tag = TAG_List(name, list_type)
+            tag.extend(tags)
+            return tag
+
+        converters = {
+            NBT_NUMBER: number,
+            NBT_STRING: lambda name, value: TAG_String(name, cls.__decode_string(value.match)),
+            NBT_WORD: lambda name, value: TAG_String(name, value.match),
+            NBT_BOOLEAN: lambda name, value: TAG_Boolean(name, value.match == 'true'),
+            NBT_BYTE_ARRAY: lambda name, value: TAG_Byte_Array(name, [int(entry.match) for entry in value.contents]),
+            NBT_INT_ARRAY: lambda name, value: TAG_Int_Array(name, [int(entry.match) for entry in value.contents]),
+            NBT_LONG_ARRAY: lambda name, value: TAG_Long_Array(name, [int(entry.match) for entry in value.contents]),
+        }
+        cls.__converters = (converters, TAG_Compound, list_tag)
+        return cls.__converters
 
 class BlockStatesToken(Token):
     """A token that contains a key-value mapping of block states."""
 
+    __slots__ = ('__states', '__original')
+
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, token.tokens)
+        super().__init__(token.match, token.group, token.tokens, token.start, _get_source_end(token), token.closer)
         self.__states = {}
-        for subtoken in token.tokens:
-            if subtoken.group.name == 'BlockStatesEnd':
-                break
+        for subtoken in token.contents:
             self.__states[subtoken.match] = subtoken.tokens[0].match
+        self.__original = tuple(self.__states.items())
     
     def __str__(self):
         return ('[' + ','.join(f'{k}={v}' for k, v in self.states.items()) + ']') if len(self.states) > 0 else ''
@@ -235,11 +488,18 @@ class BlockStatesToken(Token):
     def states(self):
         return self.__states
 
+    @property
+    def modified(self):
+        """Indicates whether the block states have been changed since they were parsed."""
+        return tuple(self.__states.items()) != self.__original
+
 class ListIndexToken(Token):
     """A token that contains a list index, the index being another token."""
 
-    def __init__(self, index: Token):
-        super().__init__("", None, [index])
+    __slots__ = ('__index',)
+
+    def __init__(self, index: Token, start: int = None, end: int = None):
+        super().__init__("", None, [index], start, end)
         self.__index = index
     
     def __str__(self):
@@ -249,74 +509,90 @@ class ListIndexToken(Token):
     def index(self):
         return self.__index
 
+    @property
+    def modified(self):
+        """Indicates whether the index has been modified since it was parsed."""
+        return getattr(self.__index, 'modified', False)
+
+    def write(self, writer: CommandWriter):
+        writer.write('[')
+        writer.write_token(self.__index)
+        writer.write(']')
+
 class DictionaryToken(Token, ABC):
-    """An abstract class for a token that contains a dictionary of key-value pairs."""
+    """An abstract class for a token that contains a dictionary of key-value pairs, where the value of each pair is parsed by `parse_value`."""
+
+    __slots__ = ('__items', '__original')
 
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, token.tokens)
+        super().__init__(token.match, token.group, token.tokens, token.start, _get_source_end(token), token.closer)
+        self.__items = {}
+        for entry in token.contents:
+            self.__items[entry.match] = self.parse_value(entry.tokens[0])
+        self.__original = tuple(self.__items.items())
     
     def __str__(self):
         return '{' + ','.join(f'{k}={v}' for k, v in self.items.items()) + '}'
 
-    @abstractproperty
+    @property
     def items(self):
+        return self.__items
+
+    @property
+    def modified(self):
+        """Indicates whether the items (or any of their values) have been changed since they were parsed."""
+        return tuple(self.__items.items()) != self.__original or any(getattr(v, 'modified', False) for v in self.__items.values())
+
+    def write(self, writer: CommandWriter):
+        writer.write('{')
+        for i, (key, value) in enumerate(self.__items.items()):
+            if i > 0:
+                writer.write(',')
+            writer.write(key)
+            writer.write('=')
+            writer.write_token(value)
+        writer.write('}')
+
+    @classmethod
+    @abstractmethod
+    def parse_value(cls, token: Token) -> Token:
+        """Parses the raw token of a value."""
         pass
 
 class ScoresToken(DictionaryToken):
     """A token that contains a mapping of scoreboard objectives to integer ranges."""
 
-    def __init__(self, token):
-        super().__init__(token)
-        self.__scores = {}
-        for score in token.tokens:
-            if score.group.name == 'ScoresClose':
-                break
-            self.__scores[score.match] = RangeToken(score.tokens[0])
-    
-    @property
-    def items(self):
-        return self.__scores
+    __slots__ = ()
+
+    @classmethod
+    def parse_value(cls, token):
+        return RangeToken(token)
 
 class CriteriaToken(DictionaryToken):
     """A token that contains a mapping of advancement criteria to a boolean value."""
 
-    def __init__(self, token):
-        super().__init__(token)
-        self.__criteria = {}
-        for adv in token.tokens:
-            if adv.group.name == 'CriteriaClose':
-                break
-            self.__criteria[adv.match] = BooleanToken(adv.tokens[0])
+    __slots__ = ()
 
-    @property
-    def items(self):
-        return self.__criteria
+    @classmethod
+    def parse_value(cls, token):
+        return BooleanToken(token)
 
 class AdvancementsToken(DictionaryToken):
     """A token that contains a mapping of advancements to either a boolean value or a `CriteriaToken`."""
 
-    def __init__(self, token):
-        super().__init__(token)
-        self.__advancements = {}
-        for adv in token.tokens:
-            if adv.group.name == 'AdvancementsClose':
-                break
-            name = adv.match
-            value = adv.tokens[0]
-            if value.group.name == 'CriteriaOpen':
-                self.__advancements[name] = CriteriaToken(value)
-            else:
-                self.__advancements[name] = BooleanToken(value)
+    __slots__ = ()
 
-    @property
-    def items(self):
-        return self.__advancements
+    @classmethod
+    def parse_value(cls, token):
+        return CriteriaToken(token) if token.group.id == CRITERIA_OPEN_ID else BooleanToken(token)
 
 class SelectorArgument(Token):
     """A token that represents a selector argument (a name with a corresponding value)."""
 
-    def __init__(self, name: str, value: Token, negated=False):
-        super().__init__(name, SelectorArgument, [value])
+    __slots__ = ('__value', '__negated')
+
+    def __init__(self, name: str, value: Token, negated=False, start: int = None, end: int = None):
+        super().__init__(name, SelectorArgument, [value], start, end)
         self.__value = value
         self.__negated = negated
     
@@ -335,25 +611,35 @@ class SelectorArgument(Token):
     def negated(self):
         return self.__negated
 
+    @property
+    def modified(self):
+        """Indicates whether the argument's value has been modified since it was parsed."""
+        return getattr(self.__value, 'modified', False)
+
+    def write(self, writer: CommandWriter):
+        writer.write(self.name)
+        writer.write('=!' if self.negated else '=')
+        writer.write_token(self.__value)
+
 class SelectorParameter(Parameter):
     """A selector parameter, containing a particular type of entity selector with an optional list of arguments."""
 
-    def __init__(self, selector: SelectorType, args: list):
-        super().__init__(selector.name, Selector, args)
+    __slots__ = ('__selector', '__args', '__original')
+
+    # The type of token that the value of each type of argument becomes (keyed on the id of the argument's group name), where other values become raw tokens.
+    __value_types = {SCORES_ARGUMENT_ID: ScoresToken, NBT_ARGUMENT_ID: NBTToken, ADVANCEMENTS_ARGUMENT_ID: AdvancementsToken}
+
+    def __init__(self, selector: SelectorType, args: list, start: int = None, end: int = None):
+        super().__init__(selector.name, Selector, args, start, end)
         self.__selector = selector
         self.__args = []
+        value_types = self.__value_types
         for token in args:
-            name = token.match
-            negated = token.tokens[0].group.name == "Negation"
+            negated = token.tokens[0].group.id == NEGATION_ID
             value = token.tokens[1] if negated else token.tokens[0]
-            if token.group.name == "ScoresArgument":
-                self.__args.append(SelectorArgument(name, ScoresToken(value), negated=negated))
-            elif token.group.name == "NBTArgument":
-                self.__args.append(SelectorArgument(name, NBTToken(value), negated=negated))
-            elif token.group.name == "AdvancementsArgument":
-                self.__args.append(SelectorArgument(name, AdvancementsToken(value), negated=negated))
-            else:
-                self.__args.append(SelectorArgument(name, RawToken(value), negated=negated))
+            argument = SelectorArgument(token.match, value_types.get(token.group.id, RawToken)(value), negated, token.start, _get_source_end(token))
+            self.__args.append(argument)
+        self.__original = tuple(self.__args)
     
     def __str__(self):
         return f"{self.selector.value}" + (f"[{', '.join(str(arg) for arg in self.args)}]" if len(self.args) > 0 else "")
@@ -365,28 +651,42 @@ class SelectorParameter(Parameter):
     @property
     def args(self):
         return self.__args
+
+    @property
+    def modified(self):
+        """Indicates whether the arguments (or any of their values) have been changed since they were parsed."""
+        return tuple(self.__args) != self.__original or any(arg.modified for arg in self.__args)
     
     def get_command_string(self):
-        selector_args = []
-        for arg in self.args:
-            operator = '=!' if arg.negated else '='
-            selector_args.append(f'{arg.name}{operator}{arg.value}')
-        return self.selector.value + (f"[{','.join(selector_args)}]" if len(selector_args) > 0 else "")
+        return CommandWriter.render(self)
+
+    def write(self, writer: CommandWriter):
+        writer.write(self.selector.value)
+        if len(self.__args) > 0:
+            writer.write('[')
+            for i, arg in enumerate(self.__args):
+                if i > 0:
+                    writer.write(',')
+                writer.write_token(arg)
+            writer.write(']')
 
 class NamespacedIDParameter(Parameter):
 
+    __slots__ = ('__block_states', '__nbt', '__nbt_token', '__original')
+
     def __init__(self, token: Token):
-        super().__init__(token.match, NamespacedID, token.tokens)
+        super().__init__(token.match, NamespacedID, token.tokens, token.start, _get_source_end(token))
         self.__block_states = {}
-        self.__nbt = TAG_Compound("")
+        self.__nbt = None
+        self.__nbt_token = None
         for subtoken in token.tokens:
-            if subtoken.group.name == 'BlockStatesOpen':
-                for state in subtoken.tokens:
-                    if state.group.name == 'BlockStatesEnd':
-                        break
+            group_id = subtoken.group.id
+            if group_id == BLOCK_STATES_OPEN_ID:
+                for state in subtoken.contents:
                     self.__block_states[state.match] = state.tokens[0].match
-            if subtoken.group.name == 'CompoundOpen':
-                self.__nbt = NBTToken(subtoken).nbt
+            elif group_id == COMPOUND_OPEN_ID:
+                self.__nbt_token = NBTToken(subtoken)
+        self.__original = tuple(self.__block_states.items())
 
     @property
     def namespace(self):
@@ -402,17 +702,34 @@ class NamespacedIDParameter(Parameter):
     
     @property
     def nbt(self):
+        if self.__nbt_token is not None:
+            return self.__nbt_token.nbt
+        if self.__nbt is None:
+            from pygradier.minecraft.NBTTags import TAG_Compound
+            self.__nbt = TAG_Compound("")
         return self.__nbt
+
+    @property
+    def modified(self):
+        """Indicates whether the block states have been changed since they were parsed, or the NBT data has been modified (see `NBTToken.modified`) or added."""
+        if tuple(self.__block_states.items()) != self.__original:
+            return True
+        if self.__nbt_token is not None:
+            return self.__nbt_token.modified
+        return self.__nbt is not None and len(self.__nbt) > 0
     
     def get_command_string(self):
         block_states_str = ('[' + ','.join(f'{k}={v}' for k, v in self.block_states.items()) + ']') if len(self.block_states) > 0 else ''
         return f"{(self.namespace + ':') if self.namespace else ''}{self.name}{block_states_str}{self.nbt if len(self.nbt) > 0 else ''}"
 
 class Comment(Parameter):
-    """A parameter that defines a comment."""
+    """A parameter that defines a comment. Its match doesn't include the '#' before it, but since comments can only begin a line, a comment parsed from
+    a line spans the whole line (from the '#') and is copied from it as it is. Comments can't be modified, only replaced."""
+
+    __slots__ = ()
 
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, [])
+        super().__init__(token.match, token.group, [], None if token.start is None else 0, token.end)
 
     def __str__(self):
         return "Comment(" + self.match + ")"
@@ -423,36 +740,100 @@ class Comment(Parameter):
 class HybridParameter(Parameter):
     """A parameter that is combined from multiple tokens where the parameter's type is ambiguous."""
 
+    __slots__ = ('__original',)
+
+    # The type of token that each subtoken becomes (keyed on the id of its group's name), where other subtokens become raw tokens.
+    __token_types = {COMPOUND_OPEN_ID: NBTToken, LIST_OPEN_ID: NBTToken, BLOCK_STATES_OPEN_ID: BlockStatesToken}
+
     def __init__(self, token: Token):
-        super().__init__(token.match, token.group, [self.__parse_token(t) for t in token.tokens])
+        super().__init__(token.match, token.group, [self.__parse_token(t) for t in token.tokens], token.start, _get_source_end(token))
+        self.__original = tuple(self.tokens)
+
+    @property
+    def modified(self):
+        """Indicates whether the subtokens (or any of their parts) have been changed since they were parsed."""
+        return tuple(self.tokens) != self.__original or any(getattr(t, 'modified', False) for t in self.tokens)
     
     def get_command_string(self):
-        return ''.join(str(token) for token in self.tokens)
+        return CommandWriter.render(self)
+
+    def write(self, writer: CommandWriter):
+        for token in self.tokens:
+            writer.write_token(token)
         
     @classmethod
     def __parse_token(cls, token):
-        if token.group.name == 'CompoundOpen' or token.group.name == 'ListOpen':
-            return NBTToken(token)
-        elif token.group.name == 'BlockStatesOpen':
-            return BlockStatesToken(token)
-        elif token.group.name == 'ListIndexOpen':
-            return ListIndexToken(cls.__parse_token(token.tokens[0]))
-        return RawToken(token)
+        group_id = token.group.id
+        if group_id == LIST_INDEX_OPEN_ID:
+            return ListIndexToken(cls.__parse_token(token.tokens[0]), token.start, _get_source_end(token))
+        return cls.__token_types.get(group_id, RawToken)(token)
 
 class MCParser:
     """A static class that parses commands in vanilla Minecraft."""
 
+    # The cache of tokenized lines (see `enable_cache`).
+    __cache = None
+
+    # Builds the parameter for each type of raw token (keyed on the id of its group's name), where other tokens become plain parameters.
+    __builders = {
+        SELECTOR_PARAMETER_ID: lambda token: SelectorParameter(SelectorType(token.match), token.contents, token.start, _get_source_end(token)),
+        HYBRID_PARAMETER_ID: HybridParameter,
+        COMMENT_ID: Comment,
+        KEYWORD_ID: lambda token: GenericParameter(token.match, token.start, token.end),
+    }
+
     def __init__(self):
         pass
 
     @staticmethod
     def get_parser() -> pygradier.Parser:
+        """Gets the parser for vanilla Minecraft commands, building it on first use. Its model is frozen (see `Model.freeze`), so the parser can be shared between threads."""
+        global PARSER
+        if PARSER is None:
+            with PARSER_LOCK:
+                if PARSER is None:
+                    # Compiling the states (which can't be pickled) costs far more than loading the JSON, so the model isn't cached.
+                    with open(os.path.join(os.path.dirname(__file__), 'mcparser.json'), 'r') as file:
+                        model = Model.from_dict(json.load(file))
+                    PARSER = Parser(model.freeze())
         return PARSER
 
+    @classmethod
+    def warmup(cls):
+        """Builds the parser and imports the NBT tag classes up front instead of on first use."""
+        from pygradier.minecraft import NBTTags
+        return cls.get_parser()
+
     @classmethod
     def tokenize(cls, line):
-        """Tokenizes a command into a list of raw tokens."""
+        """Tokenizes a command into a list of raw tokens (or a tuple of frozen tokens if the cache is enabled)."""
+        cache = cls.__cache
+        if cache is not None:
+            return cache(line)
         return cls.get_parser().tokenize(line)
+
+    @classmethod
+    def enable_cache(cls, maxsize=4096):
+        """Caches the tokens of up to `maxsize` recently tokenized lines (or every line if `maxsize` is None).
+
+        Cached tokens are frozen (see `Token.freeze`) so that they can be shared between callers. Since parameters can be modified,
+        `parse` still builds new parameters on every call, but does so from the cached tokens."""
+        cls.__cache = functools.lru_cache(maxsize=maxsize)(cls.__tokenize_frozen)
+
+    @classmethod
+    def disable_cache(cls):
+        """Disables (and discards) the cache of tokenized lines."""
+        cls.__cache = None
+
+    @classmethod
+    def cache_info(cls):
+        """Gets the hits, misses, maximum size and current size of the cache of tokenized lines (or None if the cache isn't enabled)."""
+        cache = cls.__cache
+        return cache.cache_info() if cache is not None else None
+
+    @classmethod
+    def __tokenize_frozen(cls, line):
+        return tuple(token.freeze() for token in cls.get_parser().tokenize(line))
     
     @classmethod
     def parse(cls, line):
@@ -460,29 +841,108 @@ class MCParser:
         tokens = cls.tokenize(line)
         return cls.parse_tokens(tokens)
     
+    @classmethod
+    def parse_file(cls, path, raise_errors=True):
+        """Lazily parses each command in a function file, yielding a tuple of `(path, line number, parameters)` for every line that isn't blank.
+        Lines are stripped of surrounding whitespace before being parsed. If `raise_errors` is False, the `ParserError` raised for a line is yielded in place of its parameters."""
+        with open(path, 'r', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as file:
+            for lineno, line in enumerate(file, 1):
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                try:
+                    parameters = cls.parse(line)
+                except ParserError as e:
+                    if raise_errors:
+                        raise
+                    parameters = e
+                yield path, lineno, parameters
+
+    @classmethod
+    def parse_datapack(cls, root, raise_errors=True):
+        """Lazily parses each command in every function file of a datapack, yielding a tuple of `(path, line number, parameters)` for every line that isn't blank (see `parse_file`)."""
+        for path in cls.get_function_files(root):
+            yield from cls.parse_file(path, raise_errors=raise_errors)
+
+    @classmethod
+    def check_file(cls, path):
+        """Lazily finds every error in a function file in a single pass (recovering from errors within each line), yielding a `Diagnostic` for each one."""
+        with open(path, 'r', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as file:
+            for lineno, line in enumerate(file, 1):
+                stripped = line.strip()
+                if len(stripped) == 0:
+                    continue
+                indent = len(line) - len(line.lstrip())
+                _, diagnostics = cls.get_parser().tokenize_recover(stripped, lineno)
+                for d in diagnostics:
+                    yield Diagnostic(d.error, d.expected, lineno, d.column + indent)
+
+    @classmethod
+    def check_datapack(cls, root):
+        """Lazily finds every error in every function file of a datapack, yielding a tuple of `(path, diagnostic)` for each one (see `check_file`)."""
+        for path in cls.get_function_files(root):
+            for diagnostic in cls.check_file(path):
+                yield path, diagnostic
+
+    @classmethod
+    def parse_many(cls, lines, workers=None, chunksize=512):
+        """Parses a series of commands across a pool of worker processes, returning a list with the parameters of each line (in order), or the `ParserError` raised for lines that fail to parse."""
+        lines = list(lines)
+        chunks = [lines[i:i+chunksize] for i in range(0, len(lines), chunksize)]
+        return [result for chunk in cls.__map(_parse_lines, chunks, workers) for result in chunk]
+
+    @classmethod
+    def parse_files(cls, paths, workers=None):
+        """Parses a series of function files across a pool of worker processes, returning a list with the results of `parse_file` for each file (in order), where lines that fail to parse have their `ParserError` in place of their parameters."""
+        return cls.__map(_parse_file, list(paths), workers)
+
+    @classmethod
+    def __map(cls, function, items, workers):
+        # Each worker process builds (or loads the cached) parser once when it starts.
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(items) <= 1:
+            return [function(x) for x in items]
+        # Imported here since it imports multiprocessing (and much more), which would slow down every import of this module.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=cls.get_parser) as executor:
+            return list(executor.map(function, items))
+
+    @staticmethod
+    def get_function_files(root):
+        """Lazily finds the function (.mcfunction) files in a directory (such as a datapack), in a consistent order."""
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.endswith('.mcfunction'):
+                    yield os.path.join(directory, name)
+
     @classmethod
     def parse_tokens(cls, tokens):
         """Parses a series of raw tokens into a series of parameters."""
         parameters = []
+        builders = cls.__builders
         for token in tokens:
-            parameter = None
-            if token.group.name == 'EOL':
+            group_id = token.group.id
+            if group_id == EOL_ID:
                 break
-            elif token.group.name == 'SelectorParameter':
-                selector = next(t for t in SelectorType if t.value == token.match)
-                parameter = SelectorParameter(selector, token.tokens[:-1])
-            elif token.group.name == 'HybridParameter':
-                parameter = HybridParameter(token)
-            elif token.group.name == 'Comment':
-                parameter = Comment(token)
-            elif token.group.name == 'Keyword':
-                parameter = GenericParameter(token.match)
-            else:
-                parameter = Parameter(token.match, token.group, token.tokens)
-            parameters.append(parameter)
+            builder = builders.get(group_id)
+            parameters.append(builder(token) if builder is not None else Parameter(token.match, token.group, token.tokens, token.start, _get_source_end(token)))
         return parameters
     
     @classmethod
-    def rebuild_command(cls, parameters):
-        """Rebuilds the original command string given a series of parameters."""
-        return ' '.join(x.get_command_string() for x in parameters)
+    def rebuild_command(cls, parameters, source: str = None):
+        """Rebuilds the original command string given a series of parameters. If the line that the parameters were parsed from is given, the parameters
+        that haven't been modified are copied from it as they are, rather than being rebuilt (see `CommandWriter`)."""
+        return CommandWriter().write_command(parameters, source)
+
+def _parse_lines(lines):
+    results = []
+    for line in lines:
+        try:
+            results.append(MCParser.parse(line))
+        except ParserError as e:
+            results.append(e)
+    return results
+
+def _parse_file(path):
+    return list(MCParser.parse_file(path, raise_errors=False))
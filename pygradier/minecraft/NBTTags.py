@@ -0,0 +1,44 @@
+import nbt
+from nbt.tags import *
+
+class TAG_Boolean(TAG_Byte):
+
+    def __init__(self, name: str, value: bool):
+        super().__init__(name, 1 if value else 0)
+    
+    def __str__(self):
+        return 'false' if self.value == 0 else 'true'
+
+    def set_boolean_value(self, value: bool):
+        self.value = 1 if value else 0
+
+class TAG_GenericList(nbt.NBTTag):
+
+    def __init__(self, name: str):
+        super().__init__(name, None)
+        self.__tags = []
+    
+    def __str__(self):
+        return '[' + ','.join(f'{tag}' for tag in self.tags) + ']'
+
+    @property
+    def tags(self):
+        return self.__tags
+    
+    @property
+    def value(self):
+        return self
+    
+    def validate(self, value):
+        pass
+
+    @classmethod
+    def get_id(cls):
+        return None
+    
+    def payload(self):
+        raise Exception("Generic list tags cannot be written to an NBT file.")
+    
+    @classmethod
+    def load(cls, name, fp):
+        pass
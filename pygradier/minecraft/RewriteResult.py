@@ -0,0 +1,43 @@
+class RewriteResult:
+    """The result of rewriting a function file (see `Rewriter.rewrite_file`)."""
+
+    def __init__(self, path: str, lines: int, rewritten: int, errors: list, seconds: float, written: bool):
+        self.__path = path
+        self.__lines = lines
+        self.__rewritten = rewritten
+        self.__errors = errors
+        self.__seconds = seconds
+        self.__written = written
+
+    def __str__(self):
+        return f"{self.path}: {self.rewritten}/{self.lines} lines rewritten, {len(self.errors)} errors in {self.seconds * 1e3:.3f} ms"
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def lines(self) -> int:
+        """The number of lines in the file."""
+        return self.__lines
+
+    @property
+    def rewritten(self) -> int:
+        """The number of lines that were rewritten."""
+        return self.__rewritten
+
+    @property
+    def errors(self) -> list:
+        """The errors raised while rewriting the file, as a list of `(line number, message)` tuples, where the line number is None if the whole file couldn't be rewritten.
+        Lines that fail to parse are written through as they are."""
+        return self.__errors
+
+    @property
+    def seconds(self) -> float:
+        """The time taken to rewrite the file (including reading and writing it)."""
+        return self.__seconds
+
+    @property
+    def written(self) -> bool:
+        """Indicates whether the file was written, which only happens if a line was rewritten (and it wasn't a dry run)."""
+        return self.__written
@@ -0,0 +1,213 @@
+import os, time, shutil, tempfile
+from pygradier.Parser import ParserError
+from pygradier.model.Group import Group
+from pygradier.minecraft.MCParser import MCParser, FILE_BUFFER_SIZE, SelectorParameter, SelectorArgument, HybridParameter, DictionaryToken, ListIndexToken
+from pygradier.minecraft.RewriteResult import RewriteResult
+
+# The rewriter used by each worker process (see `Rewriter.rewrite_files`).
+WORKER_REWRITER = None
+
+class Rewriter:
+    """Rewrites commands by applying visitors to their parameters, and rewrites the function files of datapacks with them.
+
+    A visitor is registered for a type of parameter or token (such as `SelectorParameter` or `ScoresToken`), or for the name of a group (such as 'word'),
+    and is called with every parameter or token of that type or group within a command, from the outermost parameters inwards. It can modify the parameter
+    in place and return None, or return a new parameter or token that replaces it (which is then given to the remaining visitors instead). Visitors of
+    the parts of a selector argument or list index (which can't be modified in place) replace the whole argument or index.
+
+    A line is only rewritten if a parameter was replaced or modified, in which case only the modified parameters are rebuilt (see `CommandWriter`) and the
+    line's indentation and line ending are kept. Every other line (including lines that fail to parse) is written through exactly as it was.
+
+    Files are rewritten in parallel across worker processes, so the visitors (and the prefilter) must be picklable, e.g. functions defined at the top level
+    of a module rather than lambdas."""
+
+    def __init__(self, prefilter=None):
+        self.__prefilter = prefilter
+        self.__type_visitors = {}
+        self.__group_visitors = {}
+        self.__visitors = {}
+
+    def __getstate__(self):
+        # The visitors of each type are looked up again in worker processes.
+        state = self.__dict__.copy()
+        state['_Rewriter__visitors'] = {}
+        return state
+
+    @property
+    def prefilter(self):
+        """A string (or compiled regular expression) that lines must contain (or match somewhere) to be parsed at all, or None to parse every line.
+        Since most lines of a datapack are usually left as they are, this skips parsing the lines that a migration can't affect."""
+        return self.__prefilter
+
+    def add_visitor(self, key, visitor):
+        """Registers a visitor for a type of parameter or token (including its subclasses), or for a group name (see `Rewriter`)."""
+        if isinstance(key, str):
+            self.__group_visitors.setdefault(Group.get_name_id(key), []).append(visitor)
+        else:
+            self.__type_visitors.setdefault(key, []).append(visitor)
+        self.__visitors.clear()
+
+    def visitor(self, key):
+        """A decorator that registers the decorated function as a visitor (see `add_visitor`)."""
+        def decorator(visitor):
+            self.add_visitor(key, visitor)
+            return visitor
+        return decorator
+
+    def rewrite_line(self, line: str) -> str:
+        """Rewrites a command, returning the rewritten command, or None if it's left as it is (including if it fails to parse). The line can be
+        surrounded by whitespace (such as its indentation and line ending), which is kept."""
+        prefilter = self.__prefilter
+        if prefilter is not None and (prefilter not in line if isinstance(prefilter, str) else prefilter.search(line) is None):
+            return None
+        command = line.strip()
+        if len(command) == 0:
+            return None
+        return self.__rewrite_command(line, command)
+
+    def rewrite_file(self, path: str, dry_run=False) -> RewriteResult:
+        """Rewrites a function file, replacing it atomically (by writing to a temporary file that's then moved over it) only if a line was rewritten.
+        If `dry_run` is True, the file is never written."""
+        started = time.perf_counter()
+        lines = []
+        errors = []
+        rewritten = 0
+        written = False
+        try:
+            # Files are read and written without translating line endings, so that the lines that aren't rewritten are written back exactly as they were.
+            with open(path, 'r', encoding='utf-8', newline='', buffering=FILE_BUFFER_SIZE) as file:
+                for lineno, line in enumerate(file, 1):
+                    try:
+                        result = self.rewrite_line(line)
+                    except ParserError as e:
+                        errors.append((lineno, str(e)))
+                        result = None
+                    if result is not None:
+                        line = result
+                        rewritten += 1
+                    lines.append(line)
+            if rewritten > 0 and not dry_run:
+                self.__write_atomically(path, lines)
+                written = True
+        except (OSError, UnicodeDecodeError) as e:
+            errors.append((None, str(e)))
+        return RewriteResult(path, len(lines), rewritten, errors, time.perf_counter() - started, written)
+
+    def rewrite_files(self, paths, workers=None, dry_run=False) -> list:
+        """Rewrites a series of function files across a pool of worker processes (see `rewrite_file`), returning a list with the result of each file (in order)."""
+        paths = list(paths)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(paths) <= 1:
+            return [self.rewrite_file(path, dry_run) for path in paths]
+        # The process pool is only imported once files are rewritten across processes.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            return list(executor.map(_rewrite_file, paths, [dry_run] * len(paths)))
+
+    def rewrite_datapack(self, root: str, workers=None, dry_run=False) -> list:
+        """Rewrites every function file of a datapack (see `rewrite_files`)."""
+        return self.rewrite_files(MCParser.get_function_files(root), workers, dry_run)
+
+    @staticmethod
+    def format_report(results: list) -> str:
+        """Formats the results of rewriting files as a table of each file (slowest first) followed by the totals."""
+        width = max([len('file')] + [len(r.path) for r in results])
+        lines = [f"{'file':<{width}} {'lines':>8} {'rewritten':>10} {'errors':>8} {'ms':>10}"]
+        for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+            lines.append(f"{r.path:<{width}} {r.lines:>8} {r.rewritten:>10} {len(r.errors):>8} {r.seconds * 1e3:>10.3f}")
+        total = sum(r.seconds for r in results)
+        lines.append(f"{'total':<{width}} {sum(r.lines for r in results):>8} {sum(r.rewritten for r in results):>10} {sum(len(r.errors) for r in results):>8} {total * 1e3:>10.3f}")
+        lines.append(f"{sum(r.written for r in results)} of {len(results)} files written")
+        return '\n'.join(lines)
+
+    def __rewrite_command(self, line, command):
+        parameters = MCParser.parse(command)
+        changed = False
+        for i, parameter in enumerate(parameters):
+            result = self.__visit(parameter)
+            if result is not parameter:
+                parameters[i] = result
+                changed = True
+            elif getattr(parameter, 'modified', False):
+                changed = True
+        if not changed:
+            return None
+        rebuilt = MCParser.rebuild_command(parameters, command)
+        if rebuilt == command:
+            return None
+        start = len(line) - len(line.lstrip())
+        end = len(line.rstrip())
+        return line[:start] + rebuilt + line[end:]
+
+    def __visit(self, node):
+        # Applies the visitors to a node and then to its parts, returning the node (or the node that replaced it).
+        for visitor in self.__get_visitors(node):
+            result = visitor(node)
+            if result is not None:
+                node = result
+
+        if isinstance(node, SelectorParameter):
+            args = node.args
+            for i, arg in enumerate(args):
+                result = self.__visit(arg)
+                if result is not arg:
+                    args[i] = result
+        elif isinstance(node, SelectorArgument):
+            value = self.__visit(node.value)
+            if value is not node.value:
+                node = SelectorArgument(node.name, value, node.negated)
+        elif isinstance(node, HybridParameter):
+            tokens = node.tokens
+            for i, token in enumerate(tokens):
+                result = self.__visit(token)
+                if result is not token:
+                    tokens[i] = result
+        elif isinstance(node, DictionaryToken):
+            items = node.items
+            for key, value in items.items():
+                result = self.__visit(value)
+                if result is not value:
+                    items[key] = result
+        elif isinstance(node, ListIndexToken):
+            index = self.__visit(node.index)
+            if index is not node.index:
+                node = ListIndexToken(index)
+        return node
+
+    def __get_visitors(self, node):
+        # The visitors of a type (including those of its base classes) are looked up once, and the visitors of the node's group are added to them.
+        cls = type(node)
+        visitors = self.__visitors.get(cls)
+        if visitors is None:
+            visitors = [v for base in reversed(cls.__mro__) for v in self.__type_visitors.get(base, ())]
+            self.__visitors[cls] = visitors
+        group = node.group
+        if self.__group_visitors and isinstance(group, Group):
+            group_visitors = self.__group_visitors.get(group.id)
+            if group_visitors is not None:
+                return visitors + group_visitors
+        return visitors
+
+    @classmethod
+    def __write_atomically(cls, path, lines):
+        directory, name = os.path.split(path)
+        fd, temp = tempfile.mkstemp(dir=directory or None, prefix=f'.{name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                file.writelines(lines)
+            shutil.copymode(path, temp)
+            os.replace(temp, path)
+        except BaseException:
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+            raise
+
+def _init_worker(rewriter):
+    global WORKER_REWRITER
+    WORKER_REWRITER = rewriter
+    MCParser.get_parser()
+
+def _rewrite_file(path, dry_run):
+    return WORKER_REWRITER.rewrite_file(path, dry_run)
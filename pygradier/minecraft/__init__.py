@@ -1,6 +1,4 @@
 from pygradier.minecraft.MCParser import MCParser
-from pygradier.minecraft.MCParser import TAG_Boolean
-from pygradier.minecraft.MCParser import TAG_GenericList
 from pygradier.minecraft.MCParser import Parameter
 from pygradier.minecraft.MCParser import GenericParameter
 from pygradier.minecraft.MCParser import HybridParameter
@@ -18,3 +16,13 @@ from pygradier.minecraft.MCParser import ScoresToken
 from pygradier.minecraft.MCParser import CriteriaToken
 from pygradier.minecraft.MCParser import AdvancementsToken
 from pygradier.minecraft.MCParser import Comment
+from pygradier.minecraft.CommandWriter import CommandWriter
+from pygradier.minecraft.Rewriter import Rewriter
+from pygradier.minecraft.RewriteResult import RewriteResult
+
+def __getattr__(name):
+    # The NBT tag classes are only imported (along with the nbt package) once they are first used.
+    if name in ('TAG_Boolean', 'TAG_GenericList'):
+        from pygradier.minecraft import NBTTags
+        return getattr(NBTTags, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,217 @@
+import re, math, time
+from collections import Counter
+from pygradier.model.Transition import Operation
+from pygradier.model.RegexSampler import RegexSampler
+
+# The lengths of the adversarial inputs that each group's regular expression is timed on (growing slowly at first so that exponential backtracking is caught early).
+STRESS_LENGTHS = (4, 8, 12, 16, 20, 24, 32, 48, 64, 128, 256, 512, 1024, 2048, 4096)
+
+# The characters appended to adversarial inputs to make them fail to match at the very end.
+STRESS_TAILS = ('', '\x00', ' ')
+
+class Analysis:
+    """A static analysis of a model (see `Model.analyze`).
+
+    Groups are found to be shadowed by generating random samples of each group's regular expression and checking whether the group ever wins a match
+    of the state's pattern (which tries its groups in order). Since the samples are random, a group that is reported as shadowed can only win on inputs
+    that weren't sampled, if any. The regular expression of each group is then timed on adversarial inputs of growing length (built by repeating parts
+    of the samples and making them fail at the end) to find catastrophic backtracking."""
+
+    def __init__(self, model, samples=50, budget=0.05, seed=0, stress=True):
+        self.__model = model
+        self.__sample_count = samples
+        self.__budget = budget
+        self.__seed = seed
+        self.__samples = {}
+
+        self.__names = model.get_state_names()
+        self.__reachable = self.__find_reachable(model.start)
+        self.__unreachable_states = [state for state in model.states if state not in self.__reachable]
+        self.__dead_transitions = []
+        self.__missing_transitions = []
+        self.__shadowed_groups = []
+        for state in self.__reachable:
+            self.__check_transitions(state)
+            self.__check_shadowing(state)
+
+        groups = {}
+        for state in self.__reachable if stress else []:
+            for group in state.groups:
+                groups.setdefault(group.name, group)
+        self.__timings = sorted((self.__stress(group) for group in groups.values()), key=lambda x: x[1], reverse=True)
+
+    def __str__(self):
+        lines = []
+        lines.append(f"Unreachable states ({len(self.unreachable_states)}):")
+        lines += [f"  {self.get_state_name(state)}" for state in self.unreachable_states]
+        lines.append(f"Dead transitions ({len(self.dead_transitions)}):")
+        lines += [f"  {self.get_state_name(state)} #{index} ({self.__describe(transition)}): {reason}" for state, index, transition, reason in self.dead_transitions]
+        lines.append(f"Groups without transitions ({len(self.missing_transitions)}):")
+        lines += [f"  {self.get_state_name(state)}: {group.name}" + (" (unless a PEEK transition applies)" if peeks else "") for state, group, peeks in self.missing_transitions]
+        lines.append(f"Shadowed groups ({len(self.shadowed_groups)}):")
+        for state, group, winners in self.shadowed_groups:
+            lines.append(f"  {self.get_state_name(state)}: {group.name} never won a match (won instead by {', '.join(f'{name} {count}x' for name, count in winners.most_common())})")
+        lines.append("Worst-case match time of each group:")
+        for group, seconds, length, text, exponent, exceeded in self.timings:
+            growth = f"~n^{exponent:.1f}" if exponent is not None else "n/a"
+            warning = "  EXCEEDED THE TIME BUDGET" if exceeded else ("  SUPERLINEAR" if exponent is not None and exponent > 1.5 else "")
+            lines.append(f"  {group.name:<24} {seconds * 1e3:>10.3f} ms at length {length:<6} growth {growth:<8} input {text[:24]!r}{warning}")
+        return '\n'.join(lines)
+
+    @property
+    def model(self):
+        return self.__model
+
+    @property
+    def unreachable_states(self) -> list:
+        """The states in the model's regions that can't be reached from the start state."""
+        return self.__unreachable_states
+
+    @property
+    def dead_transitions(self) -> list:
+        """The transitions that can never be taken, as a list of `(state, index, transition, reason)` tuples."""
+        return self.__dead_transitions
+
+    @property
+    def missing_transitions(self) -> list:
+        """The groups that a state matches without having a transition for them (so matching them raises an error), as a list of `(state, group, has PEEK transitions)` tuples."""
+        return self.__missing_transitions
+
+    @property
+    def shadowed_groups(self) -> list:
+        """The groups that never won a match of their state's pattern because of an earlier group, as a list of `(state, group, winners)` tuples,
+        where `winners` counts the groups that won the sampled matches instead."""
+        return self.__shadowed_groups
+
+    @property
+    def timings(self) -> list:
+        """The worst-case time of matching each group's regular expression against adversarial inputs (slowest first), as a list of `(group, seconds, length, input,
+        exponent, exceeded)` tuples, where `exponent` estimates how the time grows with the length of the input and `exceeded` indicates whether the time budget was exceeded."""
+        return self.__timings
+
+    def get_state_name(self, state) -> str:
+        """Gets the name of a state as `Region.State`."""
+        return self.__names.get(state, '<anonymous state>')
+
+    @classmethod
+    def __find_reachable(cls, start):
+        reachable = {start: None}
+        pending = [start]
+        while len(pending) > 0:
+            for t in pending.pop().transitions:
+                for s in (t.target, t.value):
+                    if s is not None and s not in reachable:
+                        reachable[s] = None
+                        pending.append(s)
+        return list(reachable)
+
+    def __check_transitions(self, state):
+        # Transitions are tried in order, and the first one (other than PEEK transitions) that matches the group is always taken.
+        taken = set()
+        peeked = set()
+        wildcard = False
+        for index, t in enumerate(state.transitions):
+            reason = None
+            if t.group is not None and t.group not in state.groups:
+                reason = "its group isn't matched at the state"
+            elif wildcard or t.group in taken:
+                reason = "an earlier transition is always taken instead"
+            elif t.operation == Operation.PEEK and ((t.group, t.value) in peeked or (None, t.value) in peeked):
+                reason = "an earlier PEEK transition for the same state is always taken instead"
+            elif t.group is None and t.operation != Operation.PEEK and len(state.groups) > 0 and all(g in taken for g in state.groups):
+                reason = "every group has an earlier transition"
+            if reason is not None:
+                self.__dead_transitions.append((state, index, t, reason))
+            if t.operation == Operation.PEEK:
+                peeked.add((t.group, t.value))
+            elif t.group is None:
+                wildcard = True
+            else:
+                taken.add(t.group)
+
+        for group in state.groups:
+            transition, peeks = state.resolve_transitions(group)
+            if transition is None:
+                self.__missing_transitions.append((state, group, peeks is not None))
+
+    def __check_shadowing(self, state):
+        pattern = state.pattern
+        for group in state.groups[1:]:
+            samples = self.__get_samples(group)
+            if len(samples) == 0:
+                continue
+            winners = Counter()
+            for text, context in samples:
+                won = False
+                for line in (text + context, text + context + ' '):
+                    match = pattern.match(line)
+                    if match is None:
+                        continue
+                    if match.lastgroup == group.name:
+                        won = True
+                        break
+                    winners[match.lastgroup] += 1
+                if won:
+                    break
+            else:
+                self.__shadowed_groups.append((state, group, winners))
+
+    def __get_samples(self, group):
+        # Generates the samples of a group that its own regular expression matches.
+        if group.name not in self.__samples:
+            pattern = re.compile(group.regex)
+            samples = RegexSampler(group.regex, self.__seed).samples(self.__sample_count)
+            self.__samples[group.name] = [(text, context) for text, context in samples if pattern.match(text + context)]
+        return self.__samples[group.name]
+
+    def __stress(self, group):
+        pattern = re.compile(group.regex)
+        sources = [text + context for text, context in self.__get_samples(group)[:8] if len(text + context) > 0]
+        worst = (0.0, 0, '')
+        first = None
+        exceeded = False
+        for length in STRESS_LENGTHS:
+            slowest = (0.0, length, '')
+            for text in self.__adversarial_inputs(sources, length):
+                seconds = self.__time(pattern, text)
+                if seconds > slowest[0]:
+                    slowest = (seconds, len(text), text)
+            if first is None and slowest[0] > 0:
+                first = slowest
+            if slowest[0] >= worst[0]:
+                worst = slowest
+            if slowest[0] > self.__budget:
+                exceeded = True
+                break
+
+        # Estimate the growth of the time from the smallest and largest inputs (ignoring the noise of inputs that are matched too quickly to measure).
+        exponent = None
+        if first is not None and worst[1] > first[1] and worst[0] > 1e-5:
+            exponent = math.log(worst[0] / first[0]) / math.log(worst[1] / first[1])
+        return group, worst[0], worst[1], worst[2], exponent, exceeded
+
+    @classmethod
+    def __adversarial_inputs(cls, sources, length):
+        # Repeats each character (and the whole) of a valid sample until the input has the given length, and then makes it fail at the end.
+        for source in sources:
+            positions = sorted({0, len(source) // 2, len(source) - 1})
+            for tail in STRESS_TAILS:
+                yield (source * (length // len(source) + 1))[:length] + tail
+                for i in positions:
+                    yield source[:i] + source[i] * max(length - len(source), 1) + source[i+1:] + tail
+                    yield source[:i] + source[i] * max(length - len(source), 1) + tail
+
+    @classmethod
+    def __time(cls, pattern, text):
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            pattern.match(text)
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        return best
+
+    @classmethod
+    def __describe(cls, transition):
+        group = transition.group.name if transition.group is not None else '*'
+        return f"{group} -> {transition.operation.name}"
@@ -0,0 +1,128 @@
+from pygradier.model.State import State
+from pygradier.model.Transition import Operation
+
+# The operations of a compiled transition (PEEK transitions are resolved at compile time and become GOTOs).
+GOTO = 0
+PUSH = 1
+POP = 2
+END = 3
+
+class CompiledModel:
+    """A model lowered into flat tables indexed by integer state and group ids.
+
+    For a state with id `s` and a match `m` of its pattern, `actions[s][m.lastindex]` is a tuple of
+    `(group id, operation, target state id, pushed state id, peeks)`, where `peeks` is either None or a dictionary
+    that maps the id of the state on top of the stack to an `(operation, target state id, pushed state id)` tuple
+    that overrides the transition. An operation of None indicates that no transition exists for the group."""
+
+    def __init__(self, start: State):
+        self.__states = []
+        self.__groups = []
+        state_ids = {}
+        group_ids = {}
+
+        # Number every state reachable from the start state.
+        pending = [start]
+        while len(pending) > 0:
+            state = pending.pop()
+            if state in state_ids:
+                continue
+            state_ids[state] = len(self.__states)
+            self.__states.append(state)
+            for t in reversed(state.transitions):
+                for s in (t.value, t.target):
+                    if s is not None and s not in state_ids:
+                        pending.append(s)
+
+        # Number every group that a state can match (and assign the id of its name, see `Group.id`, so that it's never assigned lazily).
+        for state in self.__states:
+            for group in state.groups:
+                if group not in group_ids:
+                    group_ids[group] = len(self.__groups)
+                    self.__groups.append(group)
+                    group.id
+
+        self.__start = state_ids[start]
+        self.__patterns = [state.compile() for state in self.__states]
+        self.__matchers = [pattern.match for pattern in self.__patterns]
+        self.__tokenize = [state.tokenize for state in self.__states]
+        self.__actions = []
+        for state, pattern in zip(self.__states, self.__patterns):
+            actions = [None] * (pattern.groups + 1)
+            for name, index in pattern.groupindex.items():
+                group = state.group_index[name]
+                transition, peeks = state.resolve_transitions(group)
+                operation, target, value = self.__lower(transition, state_ids)
+                if peeks is not None:
+                    peeks = {state_ids[s]: self.__lower(t, state_ids) for s, t in peeks.items()}
+                actions[index] = (group_ids[group], operation, target, value, peeks)
+            self.__actions.append(actions)
+        self.__state_ids = state_ids
+        self.__group_ids = group_ids
+
+    @property
+    def start(self) -> int:
+        """The id of the start state."""
+        return self.__start
+
+    @property
+    def states(self) -> list:
+        """The states of the model indexed by their id."""
+        return self.__states
+
+    @property
+    def groups(self) -> list:
+        """The groups of the model indexed by their id."""
+        return self.__groups
+
+    @property
+    def patterns(self) -> list:
+        """The compiled regular expression of each state indexed by state id."""
+        return self.__patterns
+
+    @property
+    def matchers(self) -> list:
+        """The bound `match` method of each state's compiled regular expression indexed by state id."""
+        return self.__matchers
+
+    @property
+    def tokenize(self) -> list:
+        """Whether each state generates tokens indexed by state id."""
+        return self.__tokenize
+
+    @property
+    def actions(self) -> list:
+        """The transition taken for each group that a state matches, indexed by state id and then by `match.lastindex`."""
+        return self.__actions
+
+    def freeze(self):
+        """Converts the tables into tuples so that they can't be modified (see `Model.freeze`)."""
+        self.__states = tuple(self.__states)
+        self.__groups = tuple(self.__groups)
+        self.__patterns = tuple(self.__patterns)
+        self.__matchers = tuple(self.__matchers)
+        self.__tokenize = tuple(self.__tokenize)
+        self.__actions = tuple(tuple(x) for x in self.__actions)
+        return self
+
+    def state_id(self, state: State) -> int:
+        """Gets the id of a state."""
+        return self.__state_ids[state]
+
+    def group_id(self, group) -> int:
+        """Gets the id of a group in the compiled tables (which is specific to the model, unlike the id of its name, see `Group.id`)."""
+        return self.__group_ids[group]
+
+    @classmethod
+    def __lower(cls, transition, state_ids):
+        if transition is None:
+            return None, None, None
+        target = state_ids[transition.target] if transition.target is not None else None
+        value = state_ids[transition.value] if transition.value is not None else None
+        if transition.operation == Operation.PUSH:
+            return PUSH, target, value
+        elif transition.operation == Operation.POP:
+            return POP, None, None
+        elif transition.operation == Operation.END:
+            return END, None, None
+        return GOTO, target, None
@@ -1,13 +1,51 @@
+import threading
 from abc import ABC, abstractproperty
 
+# The id of each group name (see `Group.id`), which are assigned in the order that the names are first seen.
+NAME_IDS = {}
+NAME_IDS_LOCK = threading.Lock()
+
 class Group(ABC):
     """An abstract class for a group that matches a particular regular expression."""
+
+    # The id of the group's name, assigned when a model that contains the group is compiled (or when it's first used otherwise).
+    __id = None
     
     def __init__(self):
         pass
     
     def __str__(self):
         return self.name
+
+    def __reduce_ex__(self, protocol):
+        # The predefined groups are pickled (and copied) by reference so that they remain the same objects.
+        for name, value in globals().items():
+            if value is self:
+                return name
+        return super().__reduce_ex__(protocol)
+
+    def __getstate__(self):
+        # Name ids are only valid within the process that assigned them, so they're assigned again once the group is unpickled.
+        state = self.__dict__.copy()
+        state.pop('_Group__id', None)
+        return state
+
+    @property
+    def id(self) -> int:
+        """A small integer that identifies the group's name, which is the same for every group with that name (including across models).
+        Consumers of tokens can look groups up in tables keyed on their id instead of comparing their names."""
+        if self.__id is None:
+            self.__id = self.get_name_id(self.name)
+        return self.__id
+
+    @staticmethod
+    def get_name_id(name: str) -> int:
+        """Gets the id of a group name (see `id`), assigning the next id to names that haven't been seen before."""
+        name_id = NAME_IDS.get(name)
+        if name_id is None:
+            with NAME_IDS_LOCK:
+                name_id = NAME_IDS.setdefault(name, len(NAME_IDS))
+        return name_id
     
     @abstractproperty
     def name(self) -> str:
@@ -41,6 +79,10 @@ class KeywordGroup(Group):
     def name(self):
         return self.__name
     
+    @property
+    def keywords(self):
+        return self.__keywords
+    
     @property
     def regex(self):
         return '|'.join(x.replace('|', r'\|') for x in self.__keywords)
@@ -1,5 +1,9 @@
+from collections import ChainMap
+from types import MappingProxyType
 from pygradier.model.Group import GenericGroup
+from pygradier.model.Group import KeywordGroup
 from pygradier.model.State import State
+from pygradier.model.CompiledModel import CompiledModel
 from pygradier.model.Transition import Transition
 from pygradier.model.Transition import Operation
 from pygradier.model.groups import *
@@ -23,6 +27,8 @@ class Model:
     def __init__(self, regions: dict, start: State):
         self.__regions = regions
         self.__start = start
+        self.__compiled = None
+        self.__frozen = False
     
     @property
     def regions(self) -> dict:
@@ -32,100 +38,176 @@ class Model:
     def start(self) -> State:
         return self.__start
 
+    @property
+    def states(self):
+        """Iterates over every state in the model."""
+        for states in self.regions.values():
+            yield from states.values()
+
+    @property
+    def frozen(self) -> bool:
+        """Indicates whether the model has been frozen (see `freeze`)."""
+        return self.__frozen
+
+    @property
+    def compiled(self) -> CompiledModel:
+        """The model lowered into flat tables (compiled on first use)."""
+        if self.__compiled is None:
+            self.compile()
+        return self.__compiled
+
+    def compile(self) -> CompiledModel:
+        """Compiles every state in the model up front and lowers the model into flat tables. This must be called again if the model's states are modified afterwards
+        (frozen models are already compiled)."""
+        if self.__frozen:
+            return self.__compiled
+        for state in self.states:
+            state.compile()
+        self.__compiled = CompiledModel(self.start)
+        return self.__compiled
+
+    def freeze(self) -> 'Model':
+        """Compiles the model and makes it (and its states and tables) immutable, returning the model.
+
+        A frozen model is never modified again, not even lazily: its regions become read-only mappings, the groups and transitions of its states and its
+        compiled tables become tuples, and everything that would otherwise be built on first use is built up front. It can therefore be shared by any number
+        of threads (and parsers) without locks, including on free-threaded builds of Python. Modifying a frozen state raises a TypeError. Copies of a
+        frozen model (such as pickled ones) aren't frozen."""
+        if self.__frozen:
+            return self
+        compiled = self.compile()
+        for state in set(self.states).union(compiled.states):
+            state.freeze()
+        compiled.freeze()
+        self.__regions = MappingProxyType({region: MappingProxyType(dict(states)) for region, states in self.regions.items()})
+        self.__frozen = True
+        return self
+
+    def get_state_names(self) -> dict:
+        """Gets a mapping of each state in the model's regions to its name as `Region.State`."""
+        return {state: f'{region}.{name}' for region, states in self.regions.items() for name, state in states.items()}
+
+    def analyze(self, samples=50, budget=0.05, seed=0, stress=True) -> 'Analysis':
+        """Analyzes the model for unreachable states, dead transitions, groups without transitions and groups that are shadowed by earlier groups (using `samples`
+        random samples of each group). Unless `stress` is False, each group's regular expression is also timed on adversarial inputs of growing length until a match takes
+        longer than `budget` seconds."""
+        # The analysis (and the regex sampler that it uses) is only imported once a model is first analyzed.
+        from pygradier.model.Analysis import Analysis
+        return Analysis(self, samples=samples, budget=budget, seed=seed, stress=stress)
+
+    def __reduce__(self):
+        # Models are pickled in their flat form so that large models don't exhaust the recursion limit.
+        return self.from_flat, self.to_flat()
+
+    def to_flat(self):
+        """Converts the model into a flat representation of its states that refer to each other by index, as a tuple of `(regions, states, start)`."""
+        ids = {}
+        states = []
+        pending = list(self.states) + [self.start]
+        for state in pending:
+            if state in ids:
+                continue
+            ids[state] = len(states)
+            states.append(state)
+            pending += [s for t in state.transitions for s in (t.target, t.value) if s is not None]
+        flat_states = [
+            (state.groups, state.tokenize, [(t.group, ids.get(t.target), t.operation.value, ids.get(t.value)) for t in state.transitions])
+            for state in states
+        ]
+        flat_regions = {region: {name: ids[state] for name, state in region_states.items()} for region, region_states in self.regions.items()}
+        return flat_regions, flat_states, ids[self.start]
+
+    @classmethod
+    def from_flat(cls, flat_regions, flat_states, start):
+        """Restores a model from the flat representation produced by `to_flat`."""
+        states = [State(groups, [], tokenize=tokenize) for groups, tokenize, _ in flat_states]
+        for state, (_, _, transitions) in zip(states, flat_states):
+            for group, target, operation, value in transitions:
+                target = states[target] if target is not None else None
+                value = states[value] if value is not None else None
+                state.add_transition(Transition(group, target, operation=Operation(operation), value=value))
+        regions = {region: {name: states[i] for name, i in region_states.items()} for region, region_states in flat_regions.items()}
+        return cls(regions, states[start])
+
     @classmethod
     def from_dict(cls, data, groups=PREDEFINED_GROUPS):
+        """Loads a model from its JSON representation, starting from the groups in `groups`. Neither `data` nor `groups` is modified.
+
+        Groups and templates are looked up in nested scopes (the groups given, then the top level, the region, the state's template and the state itself),
+        and states are loaded from a worklist instead of recursively, so that loading scales linearly with the size of the model."""
         regions = data['regions']
-        templates = data.get('templates', {})
-        parsed_regions = {}
-        
         start_region = data['start']['region']
         start_state = data['start']['state']
-        
-        cls.__load_group_defs(data, groups)
-        cls.__load_templates(data, groups)
-        cls.__load_state(start_region, start_state, groups, regions, parsed_regions, templates)
+
+        top_groups = ChainMap(cls.__load_group_defs(data), groups)
+        top_templates = data.get('templates', {})
+        region_scopes = {}
+        parsed_regions = {}
+        loaded = []
+
+        # Create each state reachable from the start state (in the order that they're first reached), and then add their transitions once every state exists.
+        pending = [(start_region, start_state)]
+        while len(pending) > 0:
+            region, state = pending.pop()
+            if state in parsed_regions.get(region, {}):
+                continue
+            if region not in region_scopes:
+                region_data = regions[region]
+                region_scopes[region] = (top_groups.new_child(cls.__load_group_defs(region_data)), ChainMap(region_data.get('templates', {}), top_templates))
+            region_groups, region_templates = region_scopes[region]
+
+            state_data = regions[region]['states'][state]
+            template = region_templates[state_data['template']] if 'template' in state_data else {}
+            scope = region_groups.new_child(cls.__load_group_defs(template)).new_child(cls.__load_group_defs(state_data))
+            ordered_groups = [scope[x] for x in state_data.get('groups', []) + template.get('groups', [])]
+            tokenize = state_data.get('tokenize', template.get('tokenize', True))
+            parsed_regions.setdefault(region, {})[state] = State(ordered_groups, [], tokenize=tokenize)
+
+            transitions = state_data.get('transitions', []) + template.get('transitions', [])
+            loaded.append((region, state, scope, transitions))
+            for transition in reversed(transitions):
+                if len(transition.get('value', {})) > 0:
+                    pending.append((cls.__resolve_region_name(transition['value'], region), transition['value']['state']))
+                if transition.get('target', None):
+                    pending.append((cls.__resolve_region_name(transition, region), transition['target']))
+
+        for region, state, scope, transitions in loaded:
+            parsed_state = parsed_regions[region][state]
+            for transition in transitions:
+                # Get the group that matches this transition.
+                group = scope[transition['group']] if 'group' in transition else None
+
+                # Get the target state.
+                target = None
+                target_state = transition.get('target', None)
+                if target_state:
+                    target = parsed_regions[cls.__resolve_region_name(transition, region)].get(target_state, None)
+
+                # Get the state to push (which defaults to this state).
+                operation = next(x for x in Operation if x.value == transition.get('operation', 'none'))
+                value = parsed_state
+                value_data = transition.get('value', {})
+                if len(value_data) > 0:
+                    value = parsed_regions[cls.__resolve_region_name(value_data, region)][value_data['state']]
+
+                parsed_state.add_transition(Transition(group, target, operation=operation, value=value))
 
         return cls(parsed_regions, parsed_regions[start_region][start_state])
 
     @classmethod
-    def __load_group_defs(cls, data, groups):
-        if 'group_defs' in data:
-            for group in data['group_defs']:
-                name = group['name']
+    def __load_group_defs(cls, data):
+        groups = {}
+        for group in data.get('group_defs', []):
+            name = group['name']
+            if 'keywords' in group:
+                groups[name] = KeywordGroup(name, *group['keywords'])
+            else:
                 groups[name] = GenericGroup(name, group['regex'])
-    
-    @classmethod
-    def __load_templates(cls, data, templates):
-        if 'templates' in data:
-            for key, template in data['templates'].items():
-                templates[key] = template
+        return groups
 
-    @classmethod
-    def __load_state(cls, region: str, state: str, groups: dict, regions: dict, parsed_regions: dict, templates: dict):
-        original_groups = groups.copy()
-        original_templates = templates.copy()
-        
-        # Load the region data.
-        region_data = regions[region]
-        cls.__load_group_defs(region_data, groups)
-        cls.__load_templates(region_data, templates)
-        if region not in parsed_regions:
-            parsed_regions[region] = {}
-
-        # Load the state data.
-        state_data = region_data['states'][state]
-        if 'group_defs' not in state_data:
-            state_data['group_defs'] = []
-        if 'groups' not in state_data:
-            state_data['groups'] = []
-        if 'transitions' not in state_data:
-            state_data['transitions'] = []
-        if 'template' in state_data:
-            template = templates[state_data['template']]
-            cls.__load_group_defs(template, groups)
-            state_data['groups'].extend(template.get('groups', []))
-            state_data['transitions'].extend(template.get('transitions', []))
-            if 'tokenize' not in state_data and 'tokenize' in template:
-                state_data['tokenize'] = template['tokenize']
-        cls.__load_group_defs(state_data, groups)
-        ordered_groups = [groups[x] for x in state_data['groups']]
-        tokenize = state_data.get('tokenize', True)
-        parsed_regions[region][state] = State(ordered_groups, [], tokenize=tokenize)
-
-        # Handle each transition.
-        for transition in state_data['transitions']:
-            # Get the group that matches this transition.
-            group = groups[transition['group']] if 'group' in transition else None
-            
-            # Get the region that the target state lies in.
-            target_region = cls.__resolve_region_name(transition, region)
-
-            # Get the target state.
-            target = None
-            target_state = transition.get('target', None)
-            if target_state:
-                cls.__resolve_state(target_region, target_state, original_groups, regions, parsed_regions, original_templates)
-                target = parsed_regions[target_region].get(target_state, None)
-
-            operation = next(x for x in Operation if x.value == transition.get('operation', 'none'))
-            value = parsed_regions[region][state]
-            value_data = transition.get('value', {})
-            if len(value_data) > 0:
-                value_region = cls.__resolve_region_name(value_data, region)
-                value_state = value_data['state']
-                cls.__resolve_state(value_region, value_state, original_groups, regions, parsed_regions, original_templates)
-                value = parsed_regions[value_region][value_state]
-
-            parsed_regions[region][state].transitions.append(Transition(group, target, operation=operation, value=value))
-    
     @classmethod
     def __resolve_region_name(cls, data: dict, this_region: str):
         region = data.get('region', 'this')
         if region == 'this':
             region = this_region
         return region
-
-    @classmethod
-    def __resolve_state(cls, region: str, state: str, groups: dict, regions: dict, parsed_regions: dict, templates: dict):
-        if region not in parsed_regions or state not in parsed_regions[region]:
-                cls.__load_state(region, state, groups, regions, parsed_regions, templates)
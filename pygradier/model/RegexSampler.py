@@ -0,0 +1,135 @@
+import random, string
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse, sre_constants
+
+# The characters that samples are drawn from when a pattern allows any character (or any character except some).
+ALPHABET = string.ascii_letters + string.digits + string.punctuation + ' \t'
+
+# The repeat operators (possessive repeats and atomic groups only exist from Python 3.11).
+REPEATS = tuple(getattr(sre_constants, x) for x in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT') if hasattr(sre_constants, x))
+ATOMIC_GROUP = getattr(sre_constants, 'ATOMIC_GROUP', None)
+
+# The number of extra repetitions that unbounded repeats (such as `*` and `+`) are sampled with.
+MAX_EXTRA_REPEATS = 4
+
+class RegexSampler:
+    """Generates random strings that a regular expression can match, by walking the expression's parse tree.
+
+    Each sample is a tuple of the text that a match consumes and the context that follows it (which is what positive lookaheads at the end
+    of the expression expect to see). Negative lookaheads and lookbehinds aren't taken into account, so a sample isn't guaranteed to match."""
+
+    def __init__(self, regex: str, seed=0):
+        self.__regex = regex
+        self.__tree = sre_parse.parse(regex)
+        self.__random = random.Random(seed)
+
+    @property
+    def regex(self) -> str:
+        return self.__regex
+
+    def sample(self) -> tuple:
+        """Generates a sample as a tuple of `(text, context)`."""
+        text = []
+        context = []
+        self.__generate(self.__tree, text, context, {})
+        return ''.join(text), ''.join(context)
+
+    def samples(self, count: int) -> list:
+        """Generates a list of distinct samples (which may contain fewer than `count` samples if the expression matches few strings)."""
+        samples = []
+        seen = set()
+        for _ in range(count * 4):
+            sample = self.sample()
+            if sample not in seen:
+                seen.add(sample)
+                samples.append(sample)
+                if len(samples) == count:
+                    break
+        return samples
+
+    def __generate(self, tree, text, context, groups):
+        rng = self.__random
+        for op, av in tree:
+            # The context of a lookahead is only kept if nothing is consumed after it.
+            if op != sre_constants.AT:
+                del context[:]
+            if op == sre_constants.LITERAL:
+                text.append(chr(av))
+            elif op == sre_constants.NOT_LITERAL:
+                text.append(rng.choice([c for c in ALPHABET if ord(c) != av]))
+            elif op == sre_constants.ANY:
+                text.append(rng.choice(ALPHABET.replace('\n', '')))
+            elif op == sre_constants.IN:
+                text.append(self.__choose(av))
+            elif op == sre_constants.BRANCH:
+                self.__generate(rng.choice(av[1]), text, context, groups)
+            elif op == sre_constants.SUBPATTERN:
+                group, _, _, subtree = av
+                start = len(text)
+                self.__generate(subtree, text, context, groups)
+                if group is not None:
+                    groups[group] = text[start:]
+            elif op in REPEATS:
+                low, high, subtree = av
+                high = low + MAX_EXTRA_REPEATS if high == sre_constants.MAXREPEAT else min(high, low + MAX_EXTRA_REPEATS)
+                for _ in range(rng.randint(low, high)):
+                    self.__generate(subtree, text, context, groups)
+            elif op == ATOMIC_GROUP:
+                self.__generate(av, text, context, groups)
+            elif op == sre_constants.GROUPREF:
+                text += groups.get(av, [])
+            elif op == sre_constants.ASSERT:
+                direction, subtree = av
+                if direction > 0:
+                    lookahead = []
+                    self.__generate(subtree, lookahead, [], groups)
+                    context += lookahead
+            # Anchors, negative lookaheads and lookbehinds don't generate anything.
+
+    def __choose(self, items):
+        # Chooses a character from a character set (such as `[a-z\d]` or `[^\s]`).
+        rng = self.__random
+        negate = len(items) > 0 and items[0][0] == sre_constants.NEGATE
+        if negate:
+            items = items[1:]
+            candidates = [c for c in ALPHABET if not self.__in_set(c, items)]
+            return rng.choice(candidates) if len(candidates) > 0 else '\x00'
+        op, av = rng.choice(items)
+        if op == sre_constants.LITERAL:
+            return chr(av)
+        elif op == sre_constants.RANGE:
+            return chr(rng.randint(*av))
+        elif op == sre_constants.CATEGORY:
+            return rng.choice([c for c in ALPHABET if self.__in_set(c, [(op, av)])])
+        return rng.choice(ALPHABET)
+
+    @classmethod
+    def __in_set(cls, c, items):
+        for op, av in items:
+            if op == sre_constants.LITERAL and ord(c) == av:
+                return True
+            elif op == sre_constants.RANGE and av[0] <= ord(c) <= av[1]:
+                return True
+            elif op == sre_constants.CATEGORY and cls.__in_category(c, av):
+                return True
+        return False
+
+    @classmethod
+    def __in_category(cls, c, category):
+        if category == sre_constants.CATEGORY_DIGIT:
+            return c.isdigit()
+        elif category == sre_constants.CATEGORY_NOT_DIGIT:
+            return not c.isdigit()
+        elif category == sre_constants.CATEGORY_SPACE:
+            return c.isspace()
+        elif category == sre_constants.CATEGORY_NOT_SPACE:
+            return not c.isspace()
+        elif category == sre_constants.CATEGORY_WORD:
+            return c.isalnum() or c == '_'
+        elif category == sre_constants.CATEGORY_NOT_WORD:
+            return not (c.isalnum() or c == '_')
+        return False
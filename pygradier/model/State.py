@@ -1,41 +1,147 @@
-import re
+import re, bisect
+from pygradier.model.Group import KeywordGroup
 from pygradier.model.Transition import Operation
 from pygradier.model.Transition import Transition
 
 class State:
 
     def __init__(self, groups: list, transitions: list, tokenize=True):
-        self.__groups = groups.copy()
-        self.__transitions = transitions.copy()
+        self.__groups = list(groups)
+        self.__transitions = list(transitions)
         self.__tokenize = tokenize
+        self.__pattern = None
+        self.__group_index = None
+        self.__keywords = None
+        self.__dispatch = None
+        self.__wildcard = None
+        self.__frozen = False
     
     @property
     def groups(self):
         """A list of groups that are matched at this state (in order)."""
         return self.__groups
+
+    @groups.setter
+    def groups(self, groups: list):
+        self.__check_not_frozen()
+        self.__groups = groups.copy()
+        self.invalidate()
     
     @property
     def transitions(self):
-        """A set of transitions to other states based on the matched group."""
+        """A set of transitions to other states based on the matched group (call `invalidate` after modifying it directly)."""
         return self.__transitions
 
     @property
     def tokenize(self):
         """Indicates whether the state should generate tokens."""
         return self.__tokenize
+
+    @property
+    def frozen(self):
+        """Indicates whether the state has been frozen (see `freeze`)."""
+        return self.__frozen
+
+    @property
+    def pattern(self):
+        """The compiled regular expression that fully matches this state (compiled on first use)."""
+        if self.__pattern is None:
+            self.compile()
+        return self.__pattern
+
+    @property
+    def group_index(self):
+        """A mapping of group names to the groups matched at this state."""
+        if self.__group_index is None:
+            self.compile()
+        return self.__group_index
+
+    @property
+    def keyword_index(self):
+        """A sorted list of `(keyword, group)` tuples for the keywords of the keyword groups matched at this state."""
+        if self.__keywords is None:
+            self.compile()
+        return self.__keywords
+    
+    def compile(self):
+        """Compiles the state's regular expression, group index and transition table ahead of their first use (frozen states are already compiled)."""
+        if self.__frozen:
+            return self.__pattern
+        self.__dispatch = {g: self.resolve_transitions(g) for g in self.groups}
+        self.__wildcard = self.resolve_transitions(None)
+        self.__group_index = {g.name: g for g in self.groups}
+        self.__keywords = sorted(((k, g) for g in self.groups if isinstance(g, KeywordGroup) for k in g.keywords), key=lambda x: x[0])
+        self.__pattern = self.build_regex()
+        return self.__pattern
+
+    def invalidate(self):
+        """Discards the compiled regular expression, group index and transition table so that they are rebuilt on next use."""
+        self.__check_not_frozen()
+        self.__pattern = None
+        self.__group_index = None
+        self.__keywords = None
+        self.__dispatch = None
+        self.__wildcard = None
+
+    def add_transition(self, transition: Transition):
+        """Adds a transition to the end of the state's transitions."""
+        self.__check_not_frozen()
+        self.__transitions.append(transition)
+        self.invalidate()
     
+    def freeze(self):
+        """Compiles the state and makes it immutable, so that it is never modified again (not even lazily) and can be shared between threads.
+        Its groups and transitions become tuples, and modifying the state afterwards raises a TypeError."""
+        if self.__frozen:
+            return self
+        if self.__pattern is None:
+            self.compile()
+        self.__groups = tuple(self.__groups)
+        self.__transitions = tuple(self.__transitions)
+        self.__keywords = tuple(self.__keywords)
+        self.__frozen = True
+        return self
+
+    def __check_not_frozen(self):
+        if self.__frozen:
+            raise TypeError("A frozen state can't be modified")
+
     def build_regex(self):
         """Builds the regular expression that fully matches this state."""
         pattern = f"({')|('.join(f'?P<{g.name}>{g.regex}' for g in self.groups)})"
         return re.compile(pattern)
 
+    def get_keywords(self, prefix: str):
+        """Gets the keywords matched at this state that start with the given prefix (in sorted order)."""
+        index = self.keyword_index
+        i = bisect.bisect_left(index, (prefix,))
+        keywords = []
+        while i < len(index) and index[i][0].startswith(prefix):
+            keywords.append(index[i][0])
+            i += 1
+        return keywords
+
     def get_matched_group(self, match):
-        return next((g for g in self.groups if match.group(g.name) is not None), None)
+        """Gets the group that won a match of this state's pattern."""
+        return self.group_index.get(match.lastgroup)
     
     def get_transition(self, group, stack):
+        """Gets the transition taken when the given group is matched. The target of a POP transition is the state on top of the stack."""
+        if self.__dispatch is None:
+            self.compile()
+        transition, peeks = self.__dispatch.get(group, self.__wildcard)
+        if peeks is not None and len(stack) > 0:
+            transition = peeks.get(stack[-1][0], transition)
+        return transition
+
+    def resolve_transitions(self, group):
+        """Resolves the transitions that can be taken when the given group is matched, as a tuple of the first transition that
+        isn't a PEEK and a dictionary of the PEEK transitions before it keyed by the state they expect on top of the stack."""
+        peeks = {}
         for t in self.transitions:
-            if t.operation == Operation.PEEK and stack[-1][0] != t.value:
+            if t.group is not None and t.group != group:
                 continue
-            if t.group == group or t.group is None:
-                return Transition(group, stack[-1][0], operation=t.operation) if t.operation == Operation.POP else t
-        return None
+            if t.operation != Operation.PEEK:
+                return t, peeks or None
+            peeks.setdefault(t.value, t)
+        return None, peeks or None
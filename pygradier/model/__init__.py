@@ -2,5 +2,6 @@ from pygradier.model.Group import Group
 from pygradier.model.Group import GenericGroup
 from pygradier.model.Group import KeywordGroup
 from pygradier.model.Model import Model
+from pygradier.model.CompiledModel import CompiledModel
 from pygradier.model.State import State
 from pygradier.model.Transition import Transition
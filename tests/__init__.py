@@ -0,0 +1,23 @@
+import os
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus.txt')
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pygradier', 'minecraft', 'mcparser.json')
+
+def load_corpus() -> list:
+    """Loads the shared test corpus of commands (one per line, including blank lines and commands that fail to tokenize)."""
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as file:
+        return [line.rstrip('\n') for line in file]
+
+def describe_tokens(tokens) -> list:
+    """Describes tokens (and their subtokens) by their group, match, position and closing token, so that the output of different tokenizers can be compared."""
+    return [(t.group.name, t.match, t.start, t.end, t.closer is not None, describe_tokens(t.tokens)) for t in tokens]
+
+def tokenize_all(tokenize, lines) -> list:
+    """Tokenizes every line, describing its tokens (see `describe_tokens`) or the type of error raised for it."""
+    results = []
+    for line in lines:
+        try:
+            results.append(describe_tokens(tokenize(line)))
+        except Exception as e:
+            results.append(type(e).__name__)
+    return results
@@ -0,0 +1,18 @@
+import json, unittest
+from tests import MODEL_PATH
+from pygradier.model.Model import Model
+
+class AnalysisTest(unittest.TestCase):
+
+    def test_analyze_after_importing_analysis(self):
+        # Importing the submodule binds it to the package's `Analysis` attribute, which `Model.analyze` must not pick up instead of the class.
+        from pygradier.model.Analysis import Analysis
+        with open(MODEL_PATH, 'r') as file:
+            model = Model.from_dict(json.load(file))
+        analysis = model.analyze(samples=2, stress=False)
+        self.assertIsInstance(analysis, Analysis)
+        self.assertIs(analysis.model, model)
+        self.assertEqual(analysis.timings, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os, json, tempfile, unittest
+from unittest import mock
+from tests import MODEL_PATH, load_corpus, tokenize_all
+from pygradier.CodeGenerator import CodeGenerator
+from pygradier.Parser import Parser
+from pygradier.model.Model import Model
+
+class CodeGeneratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_generated_tokenizer_matches_parser(self):
+        module = CodeGenerator.load(MODEL_PATH, os.path.join(self.directory.name, 'tokenizer.py'))
+        with open(MODEL_PATH, 'r') as file:
+            parser = Parser(Model.from_dict(json.load(file)))
+        lines = load_corpus()
+        self.assertEqual(tokenize_all(module.tokenize, lines), tokenize_all(parser.tokenize, lines))
+
+    def test_module_is_regenerated_for_different_groups(self):
+        os.environ['PYGRADIER_CACHE_DIR'] = self.directory.name
+        self.addCleanup(os.environ.pop, 'PYGRADIER_CACHE_DIR')
+        from pygradier.model.Model import PREDEFINED_GROUPS
+        from pygradier.model.Group import GenericGroup
+        first = CodeGenerator.load(MODEL_PATH)
+        groups = dict(PREDEFINED_GROUPS, word=GenericGroup('word', r'[a-z]+'))
+        second = CodeGenerator.load(MODEL_PATH, groups=groups)
+        self.assertNotEqual(first.__file__, second.__file__)
+        self.assertTrue(first.__file__.startswith(self.directory.name))
+        self.assertEqual(first.SOURCE_HASH, CodeGenerator.load(MODEL_PATH).SOURCE_HASH)
+
+    def test_module_is_regenerated_for_different_predefined_groups(self):
+        import pygradier.model.groups as predefined
+        from pygradier.model.Group import GenericGroup
+        path = os.path.join(self.directory.name, 'tokenizer.py')
+        first = CodeGenerator.load(MODEL_PATH, path)
+        with mock.patch.object(predefined, 'Word', GenericGroup('word', r'[a-z]+')):
+            second = CodeGenerator.load(MODEL_PATH, path)
+        self.assertNotEqual(first.SOURCE_HASH, second.SOURCE_HASH)
+        self.assertEqual(CodeGenerator.load(MODEL_PATH, path).SOURCE_HASH, first.SOURCE_HASH)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io, unittest
+from tests import load_corpus
+from pygradier.Parser import ParserError
+from pygradier.minecraft.MCParser import MCParser, GenericParameter, ScoresToken
+from pygradier.minecraft.CommandWriter import CommandWriter
+
+def parse_corpus():
+    """Parses every line of the corpus that parses, both as it is and prefixed with a '/', as a list of `(line, parameters)` tuples."""
+    parsed = []
+    for line in load_corpus():
+        if len(line.strip()) == 0:
+            continue
+        for command in (line, '/' + line):
+            try:
+                parsed.append((command, MCParser.parse(command)))
+            except ParserError:
+                pass
+    return parsed
+
+def find_token(node, token_type):
+    """Finds the first token of a type within a parameter (or the parameter itself)."""
+    if isinstance(node, token_type):
+        return node
+    for child in list(getattr(node, 'args', None) or ()) + list(node.tokens):
+        child = getattr(child, 'value', child)
+        found = find_token(child, token_type)
+        if found is not None:
+            return found
+    return None
+
+class CommandWriterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.parsed = parse_corpus()
+
+    def test_corpus_round_trips(self):
+        self.assertTrue(any(line.startswith('/') for line, _ in self.parsed))
+        for line, parameters in self.parsed:
+            self.assertEqual(MCParser.rebuild_command(parameters, line), line)
+
+    def test_write_command_to_stream(self):
+        stream = io.StringIO()
+        writer = CommandWriter(stream)
+        for line, parameters in self.parsed:
+            writer.write_command(parameters, line, '\n')
+        self.assertEqual(stream.getvalue(), ''.join(line + '\n' for line, _ in self.parsed))
+
+    def test_comment_is_copied(self):
+        for line in ('#nospace', '# a comment', '#   spaced  '):
+            self.assertEqual(MCParser.rebuild_command(MCParser.parse(line), line), line)
+
+    def test_replaced_parameter_keeps_leading_slash(self):
+        line = '/say hi there'
+        parameters = MCParser.parse(line)
+        parameters[0] = GenericParameter('tellraw')
+        self.assertEqual(MCParser.rebuild_command(parameters, line), '/tellraw hi there')
+
+    def test_modified_parameter_keeps_leading_slash(self):
+        line = '/tp @a[scores={old_name=1}] ~ ~ ~'
+        parameters = MCParser.parse(line)
+        scores = find_token(parameters[1], ScoresToken)
+        items = scores.items
+        items['new_name'] = items.pop('old_name')
+        self.assertEqual(MCParser.rebuild_command(parameters, line), '/tp @a[scores={new_name=1}] ~ ~ ~')
+
+if __name__ == '__main__':
+    unittest.main()
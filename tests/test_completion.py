@@ -0,0 +1,66 @@
+import unittest
+from pygradier.Parser import Parser
+from pygradier.model.Model import Model
+from pygradier.minecraft.MCParser import MCParser
+
+# A model of commands that take a game mode, where whitespace isn't tokenized (so it's never the token being completed).
+MODEL = {
+    "group_defs": [
+        {"name": "Command", "keywords": ["give", "gamemode", "gamerule", "say"]},
+        {"name": "Mode", "keywords": ["survival", "creative", "spectator"]},
+        {"name": "Space", "regex": " "},
+        {"name": "End", "regex": "$"},
+    ],
+    "start": {"region": "Root", "state": "Command"},
+    "regions": {
+        "Root": {
+            "states": {
+                "Command": {"groups": ["Command"], "transitions": [{"group": "Command", "target": "AfterCommand"}]},
+                "AfterCommand": {"groups": ["Space", "End"], "tokenize": False, "transitions": [{"group": "Space", "target": "Mode"}, {"group": "End", "operation": "end"}]},
+                "Mode": {"groups": ["Mode"], "transitions": [{"group": "Mode", "target": "AfterMode"}]},
+                "AfterMode": {"groups": ["End"], "transitions": [{"group": "End", "operation": "end"}]},
+            },
+        },
+    },
+}
+
+class CompletionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = Parser(Model.from_dict(MODEL))
+
+    def test_keywords_at_cursor(self):
+        cases = [
+            ('', 0, '', ['gamemode', 'gamerule', 'give', 'say']),
+            ('g', 0, 'g', ['gamemode', 'gamerule', 'give']),
+            ('ga', 0, 'ga', ['gamemode', 'gamerule']),
+            ('gamemode', 0, 'gamemode', ['gamemode']),
+            ('gamemode ', 9, '', ['creative', 'spectator', 'survival']),
+            ('gamemode s', 9, 's', ['spectator', 'survival']),
+            ('gamemode survival', 9, 'survival', ['survival']),
+            ('x', 0, 'x', []),
+            ('gamemode x', 9, 'x', []),
+        ]
+        for prefix, start, text, keywords in cases:
+            with self.subTest(prefix=prefix):
+                completion = self.parser.complete(prefix)
+                self.assertEqual((completion.start, completion.text, completion.keywords), (start, text, keywords))
+
+    def test_groups_and_state(self):
+        completion = self.parser.complete('gamemode c')
+        self.assertEqual([g.name for g in completion.groups], ['Mode'])
+        self.assertIs(completion.state, self.parser.model.regions['Root']['Mode'])
+        self.assertEqual(completion.stack, [])
+        self.assertEqual(str(completion), "Completion('c' at 9: creative)")
+
+    def test_minecraft_completion(self):
+        parser = MCParser.get_parser()
+        completion = parser.complete('tp @a[sc')
+        self.assertEqual((completion.start, completion.text), (6, 'sc'))
+        self.assertIn('ScoresArgument', [g.name for g in completion.groups])
+        self.assertEqual(len(completion.stack), 1)
+        completion = parser.complete('execute as @a ru')
+        self.assertEqual((completion.start, completion.text), (14, 'ru'))
+
+if __name__ == '__main__':
+    unittest.main()
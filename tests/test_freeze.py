@@ -0,0 +1,55 @@
+import json, threading, unittest
+from tests import MODEL_PATH, load_corpus, tokenize_all
+from pygradier.Parser import Parser, Engine
+from pygradier.model.Model import Model
+from pygradier.model.Transition import Transition
+
+THREADS = 8
+
+class FreezeTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(MODEL_PATH, 'r') as file:
+            self.data = json.load(file)
+        self.lines = load_corpus()
+
+    def test_threads_share_a_frozen_model(self):
+        for engine in (Engine.TABLE, Engine.GRAPH):
+            with self.subTest(engine=engine):
+                expected = tokenize_all(Parser(Model.from_dict(self.data), engine).tokenize, self.lines)
+                model = Model.from_dict(self.data).freeze()
+                shared = Parser(model, engine)
+                barrier = threading.Barrier(THREADS)
+                results = [None] * THREADS
+
+                def run(i):
+                    # Half of the threads share a parser and the others each have their own parser of the same model.
+                    parser = shared if i % 2 == 0 else Parser(model, engine)
+                    barrier.wait()
+                    results[i] = tokenize_all(parser.tokenize, self.lines)
+
+                threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                for result in results:
+                    self.assertEqual(result, expected)
+
+    def test_frozen_state_is_immutable(self):
+        model = Model.from_dict(self.data).freeze()
+        self.assertTrue(model.frozen)
+        state = model.start
+        self.assertTrue(state.frozen)
+        with self.assertRaises(TypeError):
+            state.add_transition(Transition(None, state))
+        with self.assertRaises(TypeError):
+            state.groups = []
+        with self.assertRaises(TypeError):
+            state.invalidate()
+        self.assertIsInstance(state.transitions, tuple)
+        with self.assertRaises(TypeError):
+            model.regions['Root'] = {}
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import random, unittest
+from tests import load_corpus, describe_tokens
+from pygradier.IncrementalTokenizer import IncrementalTokenizer
+from pygradier.Parser import ParserError
+from pygradier.minecraft.MCParser import MCParser
+
+# Fragments of commands that edits insert, so that edits often produce lines that tokenize.
+FRAGMENTS = [' ', ' ', 'a', 'b1', '1', '0.5', '~', '@a', '@e[', ']', '[', '{', '}', ':', ',', '=', '..', '"x"', "'y'", 'tp ', 'give ', 'scores={', 'nbt={', '1b', '[I;', '\n']
+
+def describe_line(parser, text):
+    """Describes the result of tokenizing a line in full (its tokens or the type and position of its error)."""
+    try:
+        return describe_tokens(parser.tokenize(text.rstrip('\r')))
+    except ParserError as e:
+        return type(e), e.pos
+
+class IncrementalTokenizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = MCParser.get_parser()
+        self.tokenizer = IncrementalTokenizer(self.parser)
+        self.lines = load_corpus()[:200]
+
+    def assert_line_matches(self, line):
+        if line.error is not None:
+            self.assertIsNone(line.tokens)
+            self.assertEqual((type(line.error), line.error.pos), describe_line(self.parser, line.text))
+        else:
+            self.assertEqual(describe_tokens(line.tokens), describe_line(self.parser, line.text))
+
+    def test_tokenize(self):
+        document = self.tokenizer.tokenize('\n'.join(self.lines))
+        self.assertEqual([line.text for line in document.lines], self.lines)
+        for line in document.lines:
+            self.assert_line_matches(line)
+
+    def test_edits_match_full_tokenize(self):
+        rng = random.Random(0)
+        text = '\n'.join(self.lines)
+        document = self.tokenizer.tokenize(text)
+        for i in range(2000):
+            lines = text.split('\n')
+            start_line = rng.randrange(len(lines))
+            start_column = rng.randint(0, len(lines[start_line]))
+            # Most edits are within a line, but some span several lines.
+            end_line = min(len(lines) - 1, start_line + (rng.randint(1, 2) if rng.random() < 0.05 else 0))
+            end_column = rng.randint(0 if end_line > start_line else start_column, len(lines[end_line]))
+            end_column = min(end_column, start_column + rng.randint(0, 3)) if end_line == start_line else end_column
+            inserted = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 2)))
+
+            document = self.tokenizer.update(document, (start_line, start_column), (end_line, end_column), inserted)
+            offset = lambda line, column: sum(len(x) + 1 for x in lines[:line]) + column
+            text = text[:offset(start_line, start_column)] + inserted + text[offset(end_line, end_column):]
+            self.assertEqual(document.text, text)
+            for line in document.lines[start_line:start_line + inserted.count('\n') + 1]:
+                self.assert_line_matches(line)
+        for line in document.lines:
+            self.assert_line_matches(line)
+
+    def test_unedited_lines_are_reused(self):
+        document = self.tokenizer.tokenize('say hi\ntp @a ~ ~ ~\nsay bye')
+        updated = self.tokenizer.update(document, (1, 3), (1, 5), '@e[tag=x]')
+        self.assertIs(updated.lines[0], document.lines[0])
+        self.assertIs(updated.lines[2], document.lines[2])
+        self.assertEqual(updated.lines[1].text, 'tp @e[tag=x] ~ ~ ~')
+        self.assert_line_matches(updated.lines[1])
+        # The tokens before the checkpoint that tokenizing resumed from are shared with the previous version of the line.
+        self.assertIs(updated.lines[1].tokens[0], document.lines[1].tokens[0])
+
+if __name__ == '__main__':
+    unittest.main()
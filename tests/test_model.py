@@ -0,0 +1,79 @@
+import copy, json, unittest
+from tests import MODEL_PATH, load_corpus, tokenize_all
+from pygradier.Parser import Parser
+from pygradier.model.Model import Model, PREDEFINED_GROUPS
+
+# A model whose groups and templates are defined at every scope, where inner definitions shadow outer ones.
+SCOPED_MODEL = {
+    "group_defs": [{"name": "Word", "regex": "[a-z]+"}, {"name": "Space", "regex": "\\s+"}, {"name": "End", "regex": "$"}],
+    "templates": {"Ending": {"groups": ["Space", "End"], "transitions": [{"group": "End", "operation": "end"}]}},
+    "start": {"region": "Root", "state": "Start"},
+    "regions": {
+        "Root": {
+            "group_defs": [{"name": "Word", "regex": "[a-z]+!"}],
+            "states": {
+                "Start": {
+                    "template": "Ending",
+                    "groups": ["Word", "Digits"],
+                    "group_defs": [{"name": "Digits", "regex": "[0-9]+"}],
+                    "transitions": [{"group": "Word", "target": "Start"}, {"group": "Space", "target": "Start"}, {"group": "Digits", "target": "Other", "region": "Other"}],
+                },
+            },
+        },
+        "Other": {
+            "states": {
+                "Other": {"template": "Ending", "groups": ["Word"], "transitions": [{"group": "Word", "target": "Other"}, {"group": "Space", "target": "Other"}]},
+            },
+        },
+    },
+}
+
+class ModelTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(MODEL_PATH, 'r') as file:
+            self.data = json.load(file)
+
+    def test_from_dict_does_not_modify_its_input(self):
+        data = copy.deepcopy(self.data)
+        groups = dict(PREDEFINED_GROUPS)
+        Model.from_dict(self.data)
+        Model.from_dict(SCOPED_MODEL)
+        self.assertEqual(self.data, data)
+        self.assertEqual(PREDEFINED_GROUPS, groups)
+
+    def test_repeated_loads_are_equivalent(self):
+        lines = load_corpus()
+        models = [Model.from_dict(self.data) for _ in range(3)]
+        names = [sorted(model.get_state_names().values()) for model in models]
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(names[0], names[2])
+        results = [tokenize_all(Parser(model).tokenize, lines) for model in models]
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    def test_scoped_groups_and_templates(self):
+        model = Model.from_dict(SCOPED_MODEL)
+        self.assertEqual(sorted(model.get_state_names().values()), ['Other.Other', 'Root.Start'])
+        tokens = Parser(model).tokenize("ab! 12 cd")
+        self.assertEqual([(t.group.name, t.match) for t in tokens], [('Word', 'ab!'), ('Space', ' '), ('Digits', '12'), ('Space', ' '), ('Word', 'cd'), ('End', '')])
+        # The region's definition of 'Word' only applies within the region.
+        self.assertEqual(model.regions['Root']['Start'].group_index['Word'].regex, '[a-z]+!')
+        self.assertEqual(model.regions['Other']['Other'].group_index['Word'].regex, '[a-z]+')
+
+    def test_deep_model_loads_without_recursion(self):
+        # A chain of states far longer than the recursion limit.
+        count = 5000
+        states = {f"S{i}": {"groups": ["Word"], "transitions": [{"group": "Word", "target": f"S{i + 1}"}]} for i in range(count)}
+        states[f"S{count}"] = {"groups": ["End"], "transitions": [{"group": "End", "operation": "end"}]}
+        data = {
+            "group_defs": [{"name": "Word", "regex": "a"}, {"name": "End", "regex": "$"}],
+            "start": {"region": "Root", "state": "S0"},
+            "regions": {"Root": {"states": states}},
+        }
+        model = Model.from_dict(data)
+        self.assertEqual(len(list(model.states)), count + 1)
+        self.assertEqual(len(Parser(model).tokenize("a" * count)), count + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import struct, unittest
+from pygradier.minecraft.MCParser import MCParser, NBTToken
+
+def parse_nbt(snbt: str) -> NBTToken:
+    """Parses SNBT as the data of a `data merge` command, returning its NBT token."""
+    for parameter in MCParser.parse('data merge entity @s ' + snbt):
+        for token in parameter.tokens:
+            if isinstance(token, NBTToken):
+                return token
+    raise AssertionError(f"No NBT token in {snbt}")
+
+class BinaryReader:
+    """Reads binary NBT back into plain Python values (in the form of `NBTToken.to_python`), along with the tag id of each value."""
+
+    NUMBER_FORMATS = {1: '>b', 2: '>h', 3: '>i', 4: '>q', 5: '>f', 6: '>d'}
+    ARRAY_FORMATS = {7: 'b', 11: 'i', 12: 'q'}
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read_root(self):
+        tag_id = self.read('>b')
+        name = self.read_string()
+        value = self.read_payload(tag_id)
+        assert self.pos == len(self.data), "Trailing data after the root tag"
+        return tag_id, name, value
+
+    def read(self, fmt):
+        value, = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return value
+
+    def read_string(self):
+        length = self.read('>H')
+        data = self.data[self.pos:self.pos + length]
+        self.pos += length
+        # Modified UTF-8 encodes null characters as two bytes and characters outside the BMP as a surrogate pair of three bytes each.
+        text = data.replace(b'\xc0\x80', b'\x00').decode('utf-8', 'surrogatepass')
+        return text.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+    def read_payload(self, tag_id):
+        if tag_id in self.NUMBER_FORMATS:
+            return self.read(self.NUMBER_FORMATS[tag_id])
+        if tag_id in self.ARRAY_FORMATS:
+            length = self.read('>i')
+            return [self.read('>' + self.ARRAY_FORMATS[tag_id]) for _ in range(length)]
+        if tag_id == 8:
+            return self.read_string()
+        if tag_id == 9:
+            entry_id = self.read('>b')
+            return [self.read_payload(entry_id) for _ in range(self.read('>i'))]
+        if tag_id == 10:
+            compound = {}
+            while True:
+                entry_id = self.read('>b')
+                if entry_id == 0:
+                    return compound
+                name = self.read_string()
+                compound[name] = self.read_payload(entry_id)
+        raise AssertionError(f"Unknown tag id {tag_id}")
+
+class NBTTest(unittest.TestCase):
+
+    def assert_round_trips(self, snbt, expected):
+        token = parse_nbt(snbt)
+        self.assertEqual(token.to_python(), expected)
+        tag_id, name, value = BinaryReader(token.to_bytes()).read_root()
+        self.assertEqual(name, "")
+        self.assertEqual(value, expected)
+        return tag_id
+
+    def test_compound(self):
+        self.assert_round_trips('{a:1b,b:2s,c:3,d:4l,e:1.5f,f:2.5d,g:0.25,h:true,i:false,j:word,k:"string",l:{},m:{n:[]}}',
+            {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 1.5, 'f': 2.5, 'g': 0.25, 'h': True, 'i': False, 'j': 'word', 'k': 'string', 'l': {}, 'm': {'n': []}})
+
+    def test_number_types(self):
+        data = parse_nbt('{a:1b,b:2s,c:3,d:4L,e:1.5F,f:2.5D,g:0.5,h:true}').to_bytes()
+        # Each entry of the root compound is a tag id, a two byte name length and a one byte name before its payload.
+        ids = []
+        reader = BinaryReader(data)
+        reader.read('>b')
+        reader.read_string()
+        while True:
+            tag_id = reader.read('>b')
+            if tag_id == 0:
+                break
+            ids.append(tag_id)
+            reader.read_string()
+            reader.read_payload(tag_id)
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6, 6, 1])
+
+    def test_typed_arrays(self):
+        self.assert_round_trips('{a:[B;1,-2,127],b:[I;1,2,-2147483648],c:[L;5,-9223372036854775808],d:[I;]}',
+            {'a': [1, -2, 127], 'b': [1, 2, -2147483648], 'c': [5, -9223372036854775808], 'd': []})
+
+    def test_lists(self):
+        self.assert_round_trips('{a:[1,2,3],b:["x",y],c:[{a:1},{}],d:[[1],[2b]]}', {'a': [1, 2, 3], 'b': ['x', 'y'], 'c': [{'a': 1}, {}], 'd': [[1], [2]]})
+
+    def test_mixed_type_list_is_rejected(self):
+        for snbt in ('{a:[1,2b]}', '{a:[1,"x"]}', '{a:[{},[]]}'):
+            token = parse_nbt(snbt)
+            self.assertEqual(len(token.to_python()['a']), 2)
+            with self.assertRaises(ValueError):
+                token.to_bytes()
+
+    def test_out_of_range_values(self):
+        for snbt in ('{a:128b}', '{a:-32769s}', '{a:2147483648}', '{a:9223372036854775808l}', '{a:340000000000000000000000000000000000000000.0f}',
+                '{a:[B;128]}', '{a:[I;1,2147483648]}', '{a:[L;-9223372036854775809]}'):
+            with self.assertRaises(ValueError):
+                parse_nbt(snbt).to_bytes()
+        with self.assertRaisesRegex(ValueError, r'\[I;\.\.\.\] array'):
+            parse_nbt('{a:[I;2147483648]}').to_bytes()
+
+    def test_quoted_keys(self):
+        self.assert_round_trips('{"quoted key":1,\'single \\\' quote\':2,"escaped \\" quote":3,plain:4}',
+            {'quoted key': 1, "single ' quote": 2, 'escaped " quote': 3, 'plain': 4})
+
+    def test_strings(self):
+        self.assert_round_trips('{a:"double \\" \\\\",b:\'single \\\' "\',c:"é",d:"\\u00e9\\n"}', {'a': 'double " \\', 'b': 'single \' "', 'c': 'é', 'd': 'é\n'})
+
+    def test_modified_utf8_strings(self):
+        self.assert_round_trips('{"key\U0001F600":"a\x00b\U0001F600c\u0800"}', {'key\U0001F600': 'a\x00b\U0001F600c\u0800'})
+        data = parse_nbt('{a:"\x00\U0001F600"}').to_bytes()
+        self.assertIn(b'\x00\x08\xc0\x80\xed\xa0\xbd\xed\xb8\x80', data)
+
+if __name__ == '__main__':
+    unittest.main()
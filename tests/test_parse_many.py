@@ -0,0 +1,48 @@
+import os, tempfile, unittest
+from tests import load_corpus
+from pygradier.Parser import ParserError
+from pygradier.minecraft.MCParser import MCParser
+
+def describe(result):
+    """Describes the parameters parsed from a line (by their type, group and position) or the error raised for it, so that results from other processes can be compared."""
+    if isinstance(result, ParserError):
+        return type(result), result.pos, str(result)
+    return [(type(p).__name__, p.group.name if p.group is not None else None, p.match, p.start, p.end) for p in result]
+
+def parse_serially(lines):
+    results = []
+    for line in lines:
+        try:
+            results.append(MCParser.parse(line))
+        except ParserError as e:
+            results.append(e)
+    return results
+
+class ParseManyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = [line for line in load_corpus() if len(line.strip()) > 0]
+
+    def test_parse_many_matches_serial(self):
+        expected = [describe(x) for x in parse_serially(self.lines)]
+        self.assertTrue(any(isinstance(x, tuple) for x in expected))
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = MCParser.parse_many(self.lines, workers=workers, chunksize=64)
+                self.assertEqual([describe(x) for x in results], expected)
+
+    def test_parse_files_matches_parse_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        paths = []
+        for i in range(4):
+            path = os.path.join(directory.name, f'f{i}.mcfunction')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(self.lines[i::4]) + '\n\n')
+            paths.append(path)
+        expected = [[(p, n, describe(x)) for p, n, x in MCParser.parse_file(path, raise_errors=False)] for path in paths]
+        results = MCParser.parse_files(paths, workers=2)
+        self.assertEqual([[(p, n, describe(x)) for p, n, x in result] for result in results], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os, json, tempfile, unittest
+from pygradier.CodeGenerator import CodeGenerator
+from pygradier.Parser import Parser, Engine, InvalidTokenError
+from pygradier.model.Model import Model
+
+def make_model(groups: list) -> dict:
+    """Makes a model with a single state that matches the given group definitions (as `(name, regex)` tuples) and separating whitespace
+    any number of times, with a group named 'End' ending the line."""
+    return {
+        "group_defs": [{"name": name, "regex": regex} for name, regex in groups] + [{"name": "Space", "regex": "\\s+"}],
+        "start": {"region": "Root", "state": "Tokens"},
+        "regions": {
+            "Root": {
+                "states": {
+                    "Tokens": {
+                        "groups": [name for name, _ in groups] + ["Space"],
+                        "transitions": [{"group": name, "operation": "end"} if name == 'End' else {"group": name, "target": "Tokens"} for name, _ in groups]
+                            + [{"group": "Space", "target": "Tokens"}],
+                    },
+                },
+            },
+        },
+    }
+
+class ParserTest(unittest.TestCase):
+
+    def get_tokenizers(self, data):
+        """Gets the tokenize function of every engine (including a generated tokenizer) for a model."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'model.json')
+        with open(path, 'w') as file:
+            json.dump(data, file)
+        return {
+            'table': Parser(Model.from_dict(data)).tokenize,
+            'graph': Parser(Model.from_dict(data), Engine.GRAPH).tokenize,
+            'generated': CodeGenerator.load(path, os.path.join(directory.name, 'tokenizer.py')).tokenize,
+        }
+
+    def test_caret_only_matches_at_start_of_line(self):
+        data = make_model([("First", "^[a-z]+"), ("Number", "[0-9]+"), ("End", "$")])
+        for name, tokenize in self.get_tokenizers(data).items():
+            with self.subTest(engine=name):
+                self.assertEqual([t.group.name for t in tokenize("abc 12")], ["First", "Space", "Number", "End"])
+                # Groups are matched at an offset into the whole line, so a '^'-anchored group doesn't match after the first token.
+                with self.assertRaises(InvalidTokenError) as context:
+                    tokenize("abc def")
+                self.assertEqual(context.exception.pos, 4)
+
+    def test_lookbehind_sees_previous_text(self):
+        data = make_model([("Word", "[a-z]+"), ("Suffix", "(?<=[a-z])[0-9]+"), ("Number", "[0-9]+"), ("End", "$")])
+        for name, tokenize in self.get_tokenizers(data).items():
+            with self.subTest(engine=name):
+                self.assertEqual([t.group.name for t in tokenize("ab12 34")], ["Word", "Suffix", "Space", "Number", "End"])
+
+    def test_tokens_record_offsets(self):
+        data = make_model([("Word", "[a-z]+"), ("End", "$")])
+        tokens = Parser(Model.from_dict(data)).tokenize("ab  cde")
+        self.assertEqual([(t.match, t.start, t.end) for t in tokens], [("ab", 0, 2), ("  ", 2, 4), ("cde", 4, 7), ("", 7, 7)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from collections import Counter
+from tests import load_corpus, tokenize_all
+from pygradier.Parser import Parser, InvalidTokenError
+from pygradier.model.Model import Model
+from pygradier.model.Transition import Operation
+from pygradier.minecraft.MCParser import MCParser
+
+# A grammar of words and bracketed regions of words.
+MODEL = {
+    "group_defs": [
+        {"name": "Word", "regex": "[a-z]+"},
+        {"name": "Space", "regex": "\\s+"},
+        {"name": "Open", "regex": "\\["},
+        {"name": "Close", "regex": "\\]"},
+        {"name": "End", "regex": "$"},
+    ],
+    "start": {"region": "Root", "state": "Words"},
+    "regions": {
+        "Root": {
+            "states": {
+                "Words": {
+                    "groups": ["Word", "Space", "Open", "Close", "End"],
+                    "transitions": [
+                        {"group": "Word", "target": "Words"},
+                        {"group": "Space", "target": "Words"},
+                        {"group": "Open", "target": "Words", "operation": "push", "value": {"state": "Words"}},
+                        {"group": "Close", "operation": "pop"},
+                        {"group": "End", "operation": "end"},
+                    ],
+                },
+            },
+        },
+    },
+}
+
+class ProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = Parser(Model.from_dict(MODEL))
+        self.profile = self.parser.enable_profiling()
+        self.state = self.parser.model.compiled.states.index(self.parser.model.regions['Root']['Words'])
+
+    def get_transition_counts(self):
+        """Gets the number of times that each group's transition was taken, keyed by the group's name."""
+        groups = self.parser.model.compiled.groups
+        counts = Counter()
+        for (state, group, operation, target, value), count in self.profile.transitions.items():
+            counts[groups[group].name] += count
+        return counts
+
+    def test_counts(self):
+        self.parser.tokenize("ab [cd] e")
+        # ab, ' ', '[', cd, ']', ' ', e and the end of the line.
+        self.assertEqual((self.profile.attempts[self.state], self.profile.matches[self.state]), (8, 8))
+        self.assertGreater(self.profile.time[self.state], 0)
+        self.assertEqual(self.get_transition_counts(), Counter(Word=3, Space=2, Open=1, Close=1, End=1))
+        self.assertEqual({op: self.profile.operations[op] for op in Operation}, {Operation.NONE: 5, Operation.PUSH: 1, Operation.POP: 1, Operation.END: 1, Operation.PEEK: 0})
+
+    def test_failed_attempts_are_counted(self):
+        with self.assertRaises(InvalidTokenError):
+            self.parser.tokenize("ab !")
+        self.assertEqual((self.profile.attempts[self.state], self.profile.matches[self.state]), (3, 2))
+
+    def test_counts_accumulate_until_reset(self):
+        self.parser.tokenize("ab")
+        self.parser.tokenize("ab")
+        self.assertEqual(self.profile.attempts[self.state], 4)
+        report = self.profile.report()
+        self.assertIn('Root.Words', report)
+        self.assertIn('Root.Words --Word--> Root.Words', report)
+        self.profile.reset()
+        self.assertEqual(sum(self.profile.attempts), 0)
+        self.assertEqual(len(self.profile.transitions), 0)
+        self.assertIs(self.parser.disable_profiling(), self.profile)
+        self.parser.tokenize("ab")
+        self.assertEqual(sum(self.profile.attempts), 0)
+
+    def test_profiled_tokens_match(self):
+        lines = load_corpus()
+        parser = Parser(MCParser.get_parser().model)
+        profile = parser.enable_profiling()
+        profiled = tokenize_all(parser.tokenize, lines)
+        parser.disable_profiling()
+        self.assertEqual(profiled, tokenize_all(parser.tokenize, lines))
+        self.assertEqual(sum(profile.matches), sum(profile.operations.values()) - profile.operations[Operation.PEEK])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os, json, tempfile, unittest
+from tests import load_corpus
+from pygradier.CodeGenerator import CodeGenerator
+from pygradier.Parser import Parser, Engine, ParserError, InvalidTokenError, NonExistentTransitionError, EndOfLineError
+from pygradier.model.Model import Model
+from pygradier.minecraft.MCParser import MCParser
+
+# A grammar of words and bracketed regions of words, where numbers are matched but have no transition.
+MODEL = {
+    "group_defs": [
+        {"name": "Word", "regex": "[a-z]+"},
+        {"name": "Digits", "regex": "[0-9]+"},
+        {"name": "Space", "regex": "\\s+"},
+        {"name": "Open", "regex": "\\["},
+        {"name": "Close", "regex": "\\]"},
+        {"name": "End", "regex": "$"},
+    ],
+    "start": {"region": "Root", "state": "Words"},
+    "regions": {
+        "Root": {
+            "states": {
+                "Words": {
+                    "groups": ["Word", "Digits", "Space", "Open", "Close", "End"],
+                    "transitions": [
+                        {"group": "Word", "target": "Words"},
+                        {"group": "Space", "target": "Words"},
+                        {"group": "Open", "target": "Words", "operation": "push", "value": {"state": "Words"}},
+                        {"group": "Close", "operation": "pop"},
+                        {"group": "End", "operation": "end"},
+                    ],
+                },
+            },
+        },
+    },
+}
+
+def describe(tokens):
+    return [(t.group.name, t.match, describe(t.tokens)) for t in tokens]
+
+class RecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = Parser(Model.from_dict(MODEL))
+
+    def get_tokenizers(self):
+        """Gets the tokenize function of every engine (including a generated tokenizer)."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'model.json')
+        with open(path, 'w') as file:
+            json.dump(MODEL, file)
+        profiled = Parser(Model.from_dict(MODEL))
+        profiled.enable_profiling()
+        return {
+            'table': self.parser.tokenize,
+            'graph': Parser(Model.from_dict(MODEL), Engine.GRAPH).tokenize,
+            'profiled': profiled.tokenize,
+            'generated': CodeGenerator.load(path, os.path.join(directory.name, 'tokenizer.py')).tokenize,
+        }
+
+    def test_errors_are_reported_at_the_same_position_by_every_engine(self):
+        cases = [
+            ("ab 12 cd", NonExistentTransitionError, 3),
+            ("ab [cd 123] e", NonExistentTransitionError, 7),
+            ("ab ! cd", InvalidTokenError, 3),
+            ("ab [cd", EndOfLineError, 6),
+        ]
+        for name, tokenize in self.get_tokenizers().items():
+            for line, error_type, pos in cases:
+                with self.subTest(engine=name, line=line):
+                    with self.assertRaises(error_type) as context:
+                        tokenize(line)
+                    self.assertEqual(context.exception.pos, pos)
+        for line, error_type, pos in cases:
+            _, diagnostics = self.parser.tokenize_recover(line)
+            self.assertIsInstance(diagnostics[0].error, error_type)
+            self.assertEqual(diagnostics[0].column, pos)
+
+    def test_recovery_resumes_after_the_error(self):
+        tokens, diagnostics = self.parser.tokenize_recover("ab 12 cd", lineno=4)
+        self.assertEqual([(d.lineno, d.column) for d in diagnostics], [(4, 3)])
+        self.assertEqual([t.match for t in tokens if t.group.name == 'Word'], ['ab', 'cd'])
+
+    def test_recovery_resumes_after_the_closing_bracket(self):
+        tokens, diagnostics = self.parser.tokenize_recover("ab [cd 12 [x] y] ef 34 gh")
+        self.assertEqual([(type(d.error), d.column) for d in diagnostics], [(NonExistentTransitionError, 7), (NonExistentTransitionError, 20)])
+        self.assertEqual([t.match for t in tokens if t.group.name == 'Word'], ['ab', 'ef', 'gh'])
+
+    def test_valid_lines_have_no_diagnostics(self):
+        for line in ("ab", "ab [cd [e] f] g", ""):
+            tokens, diagnostics = self.parser.tokenize_recover(line)
+            self.assertEqual(diagnostics, [])
+            self.assertEqual(describe(tokens), describe(self.parser.tokenize(line)))
+
+    def test_corpus_matches_tokenize(self):
+        parser = MCParser.get_parser()
+        for line in load_corpus():
+            tokens, diagnostics = parser.tokenize_recover(line)
+            try:
+                expected = parser.tokenize(line)
+            except ParserError as e:
+                self.assertIsInstance(diagnostics[0].error, type(e))
+                self.assertEqual(diagnostics[0].column, e.pos)
+            else:
+                self.assertEqual(diagnostics, [])
+                self.assertEqual(describe(tokens), describe(expected))
+
+    def test_check_file(self):
+        lines = ["say hi", "    tp @a ~ ~ ~", "", "  say hi ]", "give @p stone{a:1b} 1", "\tsay [", "# comment"]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'test.mcfunction')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        expected = []
+        for lineno, line in enumerate(lines, 1):
+            try:
+                MCParser.tokenize(line.strip())
+            except ParserError as e:
+                expected.append((lineno, type(e), e.pos + len(line) - len(line.lstrip())))
+        self.assertEqual(len(expected), 2)
+        diagnostics = list(MCParser.check_file(path))
+        self.assertEqual([(d.lineno, type(d.error), d.column) for d in diagnostics], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os, shutil, tempfile, unittest, importlib.util
+from unittest import mock
+from tests import load_corpus
+from pygradier.minecraft.MCParser import NBTToken, ScoresToken, GenericParameter
+from pygradier.minecraft.Rewriter import Rewriter
+from pygradier.minecraft.RewriteResult import RewriteResult
+
+HAS_NBT = importlib.util.find_spec('nbt') is not None
+
+# Lines whose NBT isn't written the way that it would be rebuilt, so they are only written through as they are if they aren't rebuilt.
+NBT_LINES = [
+    "give @p stone{a:1b,b:60l} 1",
+    "give @p stone{a:20.0F,b:'single',c:[I;1,2]} 1",
+    "data merge entity @s {Tags:['x'],Motion:[0.0d,1.0D,0.0d]}",
+]
+
+def rename_objective(token):
+    items = token.items
+    if 'a' in items:
+        renamed = [('renamed' if key == 'a' else key, value) for key, value in items.items()]
+        items.clear()
+        items.update(renamed)
+
+def read_scores(token):
+    dict(token.items)
+
+def read_nbt(token):
+    len(token.nbt)
+
+def replace_say(parameter):
+    if parameter.match == 'say':
+        return GenericParameter('tellraw')
+
+def make_lines():
+    """Makes the lines of a function file from the corpus, with some indented lines and some Windows line endings."""
+    lines = load_corpus() + NBT_LINES + ["/tp @a[scores={a=1}] ~ ~ ~", "/say hi"]
+    return [('    ' if i % 5 == 0 else '') + line + ('\r\n' if i % 3 == 0 else '\n') for i, line in enumerate(lines)]
+
+class RewriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.lines = make_lines()
+
+    def write_pack(self, name, files=4):
+        """Writes a datapack whose function files are split from the lines, returning its root."""
+        root = os.path.join(self.directory, name)
+        functions = os.path.join(root, 'data', 'test', 'functions')
+        os.makedirs(os.path.join(functions, 'sub'))
+        size = len(self.lines) // files + 1
+        for i in range(files):
+            path = os.path.join(functions, 'sub' if i % 2 else '', f'f{i}.mcfunction')
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.writelines(self.lines[i * size:(i + 1) * size])
+        return root
+
+    def write_file(self, lines):
+        path = os.path.join(self.directory, 'test.mcfunction')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.writelines(lines)
+        return path
+
+    def read_bytes(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def test_unmodified_lines_pass_through(self):
+        path = self.write_file(self.lines)
+        before = self.read_bytes(path)
+        rewriter = Rewriter()
+        rewriter.add_visitor(ScoresToken, read_scores)
+        result = rewriter.rewrite_file(path)
+        self.assertIsInstance(result, RewriteResult)
+        self.assertEqual((result.lines, result.rewritten, result.written), (len(self.lines), 0, False))
+        self.assertGreater(len(result.errors), 0)
+        self.assertEqual(self.read_bytes(path), before)
+
+    @unittest.skipUnless(HAS_NBT, "requires the nbt package")
+    def test_read_only_nbt_visitor_passes_through(self):
+        rewriter = Rewriter()
+        rewriter.add_visitor(NBTToken, read_nbt)
+        for line in NBT_LINES:
+            self.assertIsNone(rewriter.rewrite_line(line + '\r\n'))
+        path = self.write_file(self.lines)
+        before = self.read_bytes(path)
+        self.assertEqual(rewriter.rewrite_file(path).rewritten, 0)
+        self.assertEqual(self.read_bytes(path), before)
+
+    def test_only_modified_lines_are_rewritten(self):
+        path = self.write_file(self.lines)
+        rewriter = Rewriter(prefilter='scores')
+        rewriter.add_visitor(ScoresToken, rename_objective)
+        result = rewriter.rewrite_file(path)
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            rewritten = file.readlines()
+        self.assertEqual(len(rewritten), len(self.lines))
+        changed = [(old, new) for old, new in zip(self.lines, rewritten) if old != new]
+        self.assertEqual(len(changed), result.rewritten)
+        self.assertGreater(result.rewritten, 0)
+        self.assertTrue(result.written)
+        for old, new in changed:
+            self.assertIn('a=', old)
+            self.assertIn('renamed=', new)
+            # The indentation, line ending and a leading '/' are kept.
+            self.assertEqual(old[:len(old) - len(old.lstrip())], new[:len(new) - len(new.lstrip())])
+            self.assertEqual(old.endswith('\r\n'), new.endswith('\r\n'))
+            self.assertEqual(old.lstrip().startswith('/'), new.lstrip().startswith('/'))
+        self.assertIn("/tp @a[scores={renamed=1}] ~ ~ ~", ''.join(rewritten))
+
+    def test_replaced_parameter(self):
+        rewriter = Rewriter()
+        rewriter.add_visitor(GenericParameter, replace_say)
+        self.assertEqual(rewriter.rewrite_line("  /say hi\r\n"), "  /tellraw hi\r\n")
+        self.assertIsNone(rewriter.rewrite_line("tellraw @a hi\n"))
+
+    def test_write_is_atomic(self):
+        path = self.write_file(self.lines)
+        before = self.read_bytes(path)
+        rewriter = Rewriter()
+        rewriter.add_visitor(ScoresToken, rename_objective)
+        with mock.patch('os.replace', side_effect=OSError("replace failed")):
+            result = rewriter.rewrite_file(path)
+        self.assertFalse(result.written)
+        self.assertIn((None, "replace failed"), result.errors)
+        self.assertEqual(self.read_bytes(path), before)
+        self.assertEqual(os.listdir(self.directory), ['test.mcfunction'])
+
+    def test_dry_run(self):
+        path = self.write_file(self.lines)
+        before = self.read_bytes(path)
+        rewriter = Rewriter()
+        rewriter.add_visitor(ScoresToken, rename_objective)
+        result = rewriter.rewrite_file(path, dry_run=True)
+        self.assertGreater(result.rewritten, 0)
+        self.assertFalse(result.written)
+        self.assertEqual(self.read_bytes(path), before)
+
+    def test_workers_match_serial(self):
+        rewriter = Rewriter()
+        rewriter.add_visitor(ScoresToken, rename_objective)
+        rewriter.add_visitor(GenericParameter, replace_say)
+        results = {}
+        for workers in (1, 2):
+            root = self.write_pack(f'pack{workers}')
+            results[workers] = (root, rewriter.rewrite_datapack(root, workers=workers))
+        (serial_root, serial), (parallel_root, parallel) = results[1], results[2]
+        self.assertEqual(len(serial), 4)
+        for a, b in zip(serial, parallel):
+            self.assertEqual(os.path.relpath(a.path, serial_root), os.path.relpath(b.path, parallel_root))
+            self.assertEqual((a.lines, a.rewritten, a.errors, a.written), (b.lines, b.rewritten, b.errors, b.written))
+            self.assertEqual(self.read_bytes(a.path), self.read_bytes(b.path))
+        report = Rewriter.format_report(parallel)
+        self.assertIn(f"{sum(r.written for r in parallel)} of 4 files written", report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from tests import load_corpus, describe_tokens, tokenize_all
+from pygradier.Token import Token
+from pygradier.minecraft.MCParser import MCParser, ScoresToken
+
+class TokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        MCParser.enable_cache(maxsize=16)
+        self.addCleanup(MCParser.disable_cache)
+
+    def test_cached_tokens_are_reused(self):
+        line = 'tp @a[scores={a=1..2},nbt={x:[1b,2b]}] ~ ~1 ~'
+        first = MCParser.tokenize(line)
+        self.assertIs(MCParser.tokenize(line), first)
+        info = MCParser.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize, info.currsize), (1, 1, 16, 1))
+        MCParser.disable_cache()
+        self.assertIsNone(MCParser.cache_info())
+        self.assertEqual(describe_tokens(MCParser.tokenize(line)), describe_tokens(first))
+
+    def test_cached_tokens_are_frozen(self):
+        tokens = MCParser.tokenize('tp @a[scores={a=1..2},nbt={x:[1b,2b]}] ~ ~1 ~')
+        self.assertIsInstance(tokens, tuple)
+        pending = list(tokens)
+        while len(pending) > 0:
+            token = pending.pop()
+            self.assertIsInstance(token.tokens, tuple)
+            with self.assertRaises(AttributeError):
+                token.tokens.append(Token('x', token.group, []))
+            pending.extend(token.tokens)
+
+    def test_cached_tokens_match_uncached(self):
+        MCParser.enable_cache(maxsize=None)
+        lines = load_corpus()
+        cached = tokenize_all(MCParser.tokenize, lines + lines)
+        MCParser.disable_cache()
+        self.assertEqual(cached, tokenize_all(MCParser.tokenize, lines) * 2)
+
+    def test_parameters_of_cached_tokens_are_independent(self):
+        line = 'tp @a[scores={a=1}] ~ ~ ~'
+        parameters = MCParser.parse(line)
+        scores = next(arg.value for arg in parameters[1].args if isinstance(arg.value, ScoresToken))
+        scores.items['b'] = scores.items.pop('a')
+        self.assertEqual(MCParser.rebuild_command(parameters, line), 'tp @a[scores={b=1}] ~ ~ ~')
+        self.assertEqual(MCParser.rebuild_command(MCParser.parse(line), line), line)
+        self.assertEqual(MCParser.cache_info().hits, 1)
+
+if __name__ == '__main__':
+    unittest.main()